@@ -2,6 +2,7 @@
 import sys
 
 import sys
+import multiprocessing
 from PyQt6.QtWidgets import QApplication, QMessageBox
 
 try:
@@ -58,13 +59,15 @@ def main():
     
     login = LoginDialog()
     if login.exec() == LoginDialog.DialogCode.Accepted:
-        window = MainWindow(login.db_manager)
+        window = MainWindow(login.db_manager, login.profile_manager, login.connections, login.profile_name)
         window.show()
         sys.exit(app.exec())
     else:
         sys.exit(0)
 
 if __name__ == "__main__":
+    # Required for the sharded export process pool in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     main()
 
 
@@ -2,15 +2,73 @@
 import sqlalchemy
 from sqlalchemy import create_engine, inspect, text
 import pandas as pd
+import time
+import re
+import hashlib
+from src.dependency_graph import DependencyGraph
+from src.sql_utils import definition_tokens
+
+# Excel truncates cell text at this length, so longer definitions can't round-trip
+EXCEL_CELL_LIMIT = 32767
+
+# Leading whitespace / comments, then the CREATE (or ALTER) keyword of a routine definition
+ROUTINE_HEADER_RE = re.compile(r'^((?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*)(CREATE(?:\s+OR\s+ALTER)?|ALTER)\b',
+                               re.IGNORECASE | re.DOTALL)
+
+# Object name after CREATE OR ALTER: PROCEDURE / FUNCTION, then [schema].[name], schema.name or name
+ROUTINE_NAME_RE = re.compile(r'(\s+(?:PROC(?:EDURE)?|FUNCTION)\s+)((?:\[[^\]]+\]|[^\s.(\[]+)(?:\s*\.\s*(?:\[[^\]]+\]|[^\s.(\[]+))?)',
+                             re.IGNORECASE)
+
+# Limits for one round trip of batched DDL
+BATCH_MAX_STATEMENTS = 200
+BATCH_MAX_CHARS = 1_000_000
+
+# Types whose Length is part of the type definition; an empty / -1 length of a MAX type means (MAX)
+TYPES_WITH_LEN = ['VARCHAR', 'NVARCHAR', 'CHAR', 'NCHAR', 'VARBINARY']
+MAX_TYPES = ['VARCHAR', 'NVARCHAR', 'VARBINARY']
+PRECISION_TYPES = ['DECIMAL', 'NUMERIC']
+
+
+def precision_value(length):
+    """(precision, scale) of a DECIMAL / NUMERIC Length such as '18,2' or '10' (scale 0)."""
+    parts = [p.strip() for p in length.split(',')]
+    try:
+        return int(parts[0]), int(parts[1]) if len(parts) > 1 and parts[1] else 0
+    except ValueError:
+        return length.replace(' ', '')
+
+
+def length_value(length):
+    """Comparable value of a normalized Length: MAX / -1 is unbounded, None if not a number."""
+    if length.upper() in ('MAX', '-1'):
+        return float('inf')
+    try:
+        return int(length)
+    except ValueError:
+        return None
+
+
+def routine_hash(definition):
+    """
+    SHA-256 of a routine definition, matching the server-side
+    HASHBYTES('SHA2_256', REPLACE(definition, CHAR(13), '')) of an NVARCHAR.
+    Carriage returns are ignored since Excel round-trips may change line endings.
+    """
+    return hashlib.sha256(definition.replace('\r', '').encode('utf-16-le')).hexdigest().upper()
+
 
 class DBManager:
     def __init__(self, server, database, user, password):
+        self.database = database
+        self._dependency_cache = None  # (catalog stamp, DependencyGraph)
+        self._routine_tokens = {}      # routine hash -> definition tokens
         self.connection_string = f"mssql+pyodbc://{user}:{password}@{server}/{database}?driver=ODBC+Driver+17+for+SQL+Server"
         self.engine = None
 
     def connect(self):
         try:
-            self.engine = create_engine(self.connection_string)
+            # pre_ping lets a cached engine recover connections dropped while idle
+            self.engine = create_engine(self.connection_string, pool_pre_ping=True)
             with self.engine.connect() as conn:
                 print("Connection successful!")
             return True, ""
@@ -18,6 +76,11 @@ class DBManager:
             print(f"Error connecting: {e}")
             return False, str(e)
 
+    def dispose(self):
+        """Closes pooled connections. The engine reconnects on next use."""
+        if self.engine:
+            self.engine.dispose()
+
     def get_tables(self):
         """Returns a list of all table names in the database."""
         if not self.engine: return []
@@ -46,6 +109,10 @@ class DBManager:
             except:
                 # Fallback
                 type_name = type(col_type).__name__.upper()
+
+            # DECIMAL / NUMERIC: export "precision,scale" so the type round-trips
+            if type_name in PRECISION_TYPES and getattr(col_type, 'precision', None) is not None:
+                length = f"{col_type.precision},{col_type.scale or 0}"
             
             c_info = {
                 'Table': table_name,
@@ -79,28 +146,459 @@ class DBManager:
         """Fetches Stored Procedures and Scalar/Table-valued Functions."""
         if not self.engine: return pd.DataFrame()
         
+        # sys.sql_modules holds the full text (INFORMATION_SCHEMA.ROUTINES truncates at 4000 chars),
+        # which is required to deploy edited definitions back.
         query = text("""
             SELECT 
-                ROUTINE_NAME as name,
-                ROUTINE_TYPE as type,
-                ROUTINE_DEFINITION as definition
-            FROM INFORMATION_SCHEMA.ROUTINES 
-            WHERE ROUTINE_BODY = 'SQL'
-            ORDER BY ROUTINE_TYPE, ROUTINE_NAME
+                s.name as [schema],
+                o.name as name,
+                CASE WHEN o.type = 'P' THEN 'PROCEDURE' ELSE 'FUNCTION' END as type,
+                m.definition as definition
+            FROM sys.sql_modules m
+            JOIN sys.objects o ON o.object_id = m.object_id
+            JOIN sys.schemas s ON s.schema_id = o.schema_id
+            WHERE o.type IN ('P', 'FN', 'IF', 'TF') AND o.is_ms_shipped = 0
+            ORDER BY type, o.name
         """)
         
         try:
             with self.engine.connect() as conn:
                 result = conn.execute(query)
-                return pd.DataFrame(result.fetchall(), columns=['name', 'type', 'definition'])
+                return pd.DataFrame(result.fetchall(), columns=['schema', 'name', 'type', 'definition'])
         except Exception as e:
             print(f"Error fetching routines: {e}")
             return pd.DataFrame()
 
-    def sync_schema(self, excel_df):
+    def get_routine_hashes(self):
+        """
+        Returns {(schema, name): hash} for every procedure/function, in one query.
+        Hashing happens on the server so definitions are not transferred.
+        """
+        if not self.engine: return {}
+
+        query = text("""
+            SELECT 
+                s.name,
+                o.name,
+                CONVERT(VARCHAR(64), HASHBYTES('SHA2_256', REPLACE(m.definition, CHAR(13), '')), 2)
+            FROM sys.sql_modules m
+            JOIN sys.objects o ON o.object_id = m.object_id
+            JOIN sys.schemas s ON s.schema_id = o.schema_id
+            WHERE o.type IN ('P', 'FN', 'IF', 'TF') AND o.is_ms_shipped = 0
+        """)
+
+        with self.engine.connect() as conn:
+            return {(sch.lower(), name.lower()): h for sch, name, h in conn.execute(query)}
+
+    def _fetch_current_schemas(self):
+        """Pre-fetches the column info of every table in the DB, keyed by table name."""
+        current_schemas = {}
+        for t in self.get_tables():
+            current_schemas[t] = self.get_table_schema(t)
+        return current_schemas
+
+    def _normalize_length(self, data_type, raw_len):
+        """Normalizes a Length cell: '' when empty, 'MAX' for an empty / -1 / max length of a MAX type."""
+        raw_len = str(raw_len).strip()
+        if raw_len.lower() in ['nan', 'none', '']:
+            length = ''
+        else:
+            try:
+                length = str(int(float(raw_len)))
+            except:
+                length = raw_len
+
+        if data_type in MAX_TYPES and length.upper() in ['', '-1', 'MAX']:
+            length = 'MAX'
+        return length
+
+    def _excel_column_def(self, row):
+        """Returns (data type, length, type definition, NULL / NOT NULL) for a workbook row."""
+        # -- Prepare New attributes (from Excel) --
+        new_type = str(row['Data Type']).strip().upper()
+        new_len = self._normalize_length(new_type, row['Length'])
+                
+        # Construct type definition
+        type_def = new_type
+        if new_type in TYPES_WITH_LEN and new_len:
+            type_def = f"{new_type}({new_len})"
+        elif new_type in PRECISION_TYPES and new_len:
+            type_def = f"{new_type}({new_len})"
+
+        # Nullability
+        null_val = str(row['Allow Null']).strip().upper()
+        null_def = "NULL" if null_val == 'Y' else "NOT NULL"
+
+        return new_type, new_len, type_def, null_def
+
+    def _check_precision(self, table_name, col, new_type, new_len):
+        """Refuses DDL for DECIMAL / NUMERIC without precision (SQL Server would silently use (18,0))."""
+        if new_type in PRECISION_TYPES and not new_len:
+            raise ValueError(f"[{table_name}].[{col}] {new_type} needs precision in Length (e.g. 18,2)")
+
+    def plan_create_table(self, table_name, group):
+        """
+        Builds a CREATE TABLE change for a table that only exists in the workbook,
+        with defaults from 'Default Value' and a PK constraint from the 'PK' column.
+        """
+        col_defs = []
+        pk_cols = []
+        for _, row in group.iterrows():
+            col = row['Column Name']
+            new_type, new_len, type_def, null_def = self._excel_column_def(row)
+            self._check_precision(table_name, col, new_type, new_len)
+
+            is_pk = str(row.get('PK', '')).strip().upper() == 'Y'
+            if is_pk:
+                pk_cols.append(col)
+                null_def = "NOT NULL"  # PK columns can't be nullable
+
+            col_def = f"[{col}] {type_def} {null_def}"
+            default = str(row.get('Default Value', '')).strip()
+            if default and default.lower() not in ['nan', 'none']:
+                col_def += f" DEFAULT {default}"
+            col_defs.append(col_def)
+
+        if pk_cols:
+            pk_list = ", ".join(f"[{c}]" for c in pk_cols)
+            col_defs.append(f"CONSTRAINT [PK_{table_name}] PRIMARY KEY ({pk_list})")
+
+        sql = f"CREATE TABLE [{table_name}] (\n    " + ",\n    ".join(col_defs) + "\n)"
+        return {
+            'Table': table_name, 'Column': '', 'Operation': 'CREATE',
+            'Detail': f"Created Table [{table_name}] ({len(group)} columns)",
+            'SQL': sql,
+            # CREATE TABLE can share a batch, so many new tables go in one round trip
+            'Batch': sql + ";",
+        }
+
+    def plan_sync(self, excel_df, current_schemas):
+        """
+        Compares the Excel schema with the pre-fetched DB schema.
+        Returns a list of change dicts (Table, Column, Operation, Detail, SQL) in execution order.
+        New tables come first, so their CREATE statements are batched together.
+        """
+        creates = []
+        changes = []
+
+        # Group by table
+        for table_name, group in excel_df.groupby('Table'):
+            
+            # Fetch pre-loaded schema
+            current_df = current_schemas.get(table_name)
+            
+            # NEW TABLE: in the workbook but not in the DB
+            if current_df is None or current_df.empty: 
+                creates.append(self.plan_create_table(table_name, group))
+                continue 
+            
+            # Convert to dict for lookup
+            curr_map = {row['Column Name']: row for _, row in current_df.iterrows()}
+            
+            for _, row in group.iterrows():
+                col = row['Column Name']
+                new_type, new_len, type_def, null_def = self._excel_column_def(row)
+
+                # 1. ADD Column (If not in DB)
+                if col not in curr_map:
+                    self._check_precision(table_name, col, new_type, new_len)
+                    changes.append({
+                        'Table': table_name, 'Column': col, 'Operation': 'ADD',
+                        'Detail': f"Added Column [{table_name}].[{col}] ({type_def})",
+                        'SQL': f"ALTER TABLE [{table_name}] ADD [{col}] {type_def} {null_def}",
+                    })
+                    continue
+                
+                # 2. MATCH/MODIFY Existing
+                curr = curr_map[col]
+                
+                # -- Prepare Old attributes (from DB) --
+                old_type = str(curr['Data Type']).strip().upper()
+                # Reflection reports MAX columns without a length
+                old_len = self._normalize_length(old_type, curr['Length'])
+
+                # Check differences
+                is_diff = False
+                if new_type != old_type:
+                    is_diff = True
+                elif new_type in TYPES_WITH_LEN and new_len != old_len:
+                    is_diff = True
+                elif new_type in PRECISION_TYPES and new_len and precision_value(new_len) != precision_value(old_len):
+                    # An empty Length (older exports) leaves the precision as it is
+                    is_diff = True
+                    
+                if is_diff:
+                    self._check_precision(table_name, col, new_type, new_len)
+                    change = {
+                        'Table': table_name, 'Column': col, 'Operation': 'ALTER',
+                        'Detail': f"Updated [{table_name}].[{col}]: {old_type}({old_len}) -> {type_def}",
+                        'SQL': f"ALTER TABLE [{table_name}] ALTER COLUMN [{col}] {type_def} {null_def}",
+                    }
+                    # Same type, longer length, nullability not tightened: dependents keep working
+                    old_value, new_value = length_value(old_len), length_value(new_len)
+                    if (new_type == old_type and old_value is not None and new_value is not None
+                            and new_value > old_value
+                            and not (null_def == "NOT NULL" and str(curr['Allow Null']).strip().upper() == 'Y')):
+                        change['Widening'] = True
+                    changes.append(change)
+
+            # 3. DROP Column (If in DB but not in Excel)
+            excel_cols = set(group['Column Name'])
+            db_cols = set(curr_map.keys())
+            dropped_cols = db_cols - excel_cols
+            
+            for d_col in dropped_cols:
+                changes.append({
+                    'Table': table_name, 'Column': d_col, 'Operation': 'DROP',
+                    'Detail': f"Dropped Column [{table_name}].[{d_col}]",
+                    'SQL': f"ALTER TABLE [{table_name}] DROP COLUMN [{d_col}]",
+                })
+
+        return creates + changes
+
+    def _catalog_stamp(self, conn):
+        return tuple(conn.execute(text("SELECT COUNT(*), MAX(modify_date) FROM sys.objects")).fetchone())
+
+    def get_catalog_stamp(self):
+        """
+        (object count, last modify_date) of sys.objects. Changes whenever any object is
+        created, altered or dropped, so it can tag caches built from the catalog.
+        """
+        if not self.engine: return None
+        with self.engine.connect() as conn:
+            return self._catalog_stamp(conn)
+
+    def get_dependency_graph(self):
+        """
+        Dependency graph of the DB from one bulk query on sys.sql_expression_dependencies.
+        Cached with the catalog stamp (object count + last modify_date) and only
+        re-queried when any object was created, altered or dropped.
+        """
+        if not self.engine: return DependencyGraph()
+
+        query = text("""
+            SELECT 
+                OBJECT_SCHEMA_NAME(d.referencing_id),
+                OBJECT_NAME(d.referencing_id),
+                CASE 
+                    WHEN o.type = 'P' THEN 'PROCEDURE'
+                    WHEN o.type IN ('FN', 'IF', 'TF') THEN 'FUNCTION'
+                    WHEN o.type = 'V' THEN 'VIEW'
+                    WHEN o.type = 'TR' THEN 'TRIGGER'
+                    ELSE o.type_desc
+                END,
+                d.referenced_entity_name,
+                CASE WHEN d.referenced_minor_id > 0 THEN COL_NAME(d.referenced_id, d.referenced_minor_id) END,
+                d.is_schema_bound_reference
+            FROM sys.sql_expression_dependencies d
+            JOIN sys.objects o ON o.object_id = d.referencing_id
+            WHERE d.referenced_database_name IS NULL
+        """)
+
+        with self.engine.connect() as conn:
+            stamp = self._catalog_stamp(conn)
+            if self._dependency_cache and self._dependency_cache[0] == stamp:
+                return self._dependency_cache[1]
+            rows = conn.execute(query).fetchall()
+
+        graph = DependencyGraph()
+        graph.add_rows(rows)
+        self._dependency_cache = (stamp, graph)
+        return graph
+
+    def _routine_dependency_graph(self, routines_df, current_schemas):
+        """
+        Parses routine definitions (from the workbook) for table / column references.
+        Tokens are cached per definition hash, so unchanged routines are not re-parsed.
+        """
+        graph = DependencyGraph()
+        if routines_df is None or routines_df.empty:
+            return graph
+
+        columns_by_table = {
+            t.lower(): {str(c).lower() for c in df['Column Name']} if not df.empty else set()
+            for t, df in current_schemas.items()
+        }
+        has_schema = 'schema' in routines_df.columns
+        for row in routines_df.itertuples(index=False):
+            definition = str(row.definition)
+            key = routine_hash(definition)
+            tokens = self._routine_tokens.get(key)
+            if tokens is None:
+                tokens = self._routine_tokens[key] = definition_tokens(definition)
+            schema = (str(row.schema).strip() if has_schema else '') or 'dbo'
+            label = f"{str(row.type).strip().upper()} [{schema}].[{str(row.name).strip()}]"
+            graph.add_definition(label, tokens, columns_by_table)
+        return graph
+
+    def check_dependencies(self, changes, graph):
+        """
+        Annotates ALTER / DROP column changes with the objects depending on that column
+        (change['Impact']) and returns (warnings, blocking), one warning per affected change.
+        Objects without known column references fall back to their table edge and are listed as possible.
+        Only changes hitting server-tracked column edges are blocking. ALTERs that just widen
+        a column are only checked against schema-bound objects, which refuse any ALTER COLUMN.
+        """
+        warnings = []
+        blocking = []
+        for change in changes:
+            if change['Operation'] not in ('ALTER', 'DROP'):
+                continue
+            exact, possible = graph.impact(change['Table'], change['Column'], widening=change.get('Widening', False))
+            if exact or possible:
+                parts = sorted(exact)
+                if possible:
+                    parts.append("possibly " + ", ".join(sorted(possible)))
+                change['Impact'] = ", ".join(parts)
+                warning = f"{change['Operation']} [{change['Table']}].[{change['Column']}] may break: {change['Impact']}"
+                warnings.append(warning)
+                if exact:
+                    blocking.append(warning)
+        return warnings, blocking
+
+    def plan_routines(self, routines_df, server_hashes):
+        """
+        Compares routine definitions from the workbook with the server hashes.
+        Returns (changes, skipped): changed or new routines as batchable CREATE OR ALTER changes,
+        and one message per routine that can't be deployed from the workbook.
+        Routines missing from the workbook are never dropped.
+        """
+        changes = []
+        skipped = []
+        if routines_df is None or routines_df.empty:
+            return changes, skipped
+
+        # Server schemas per routine name, for workbooks exported without a schema column
+        schemas_by_name = {}
+        for server_schema, server_name in server_hashes:
+            schemas_by_name.setdefault(server_name, []).append(server_schema)
+
+        has_schema = 'schema' in routines_df.columns
+        for row in routines_df.itertuples(index=False):
+            definition = str(row.definition)
+            name = str(row.name).strip()
+            schema = str(row.schema).strip() if has_schema else ''
+            if not name or not definition.strip():
+                continue
+
+            if not schema:
+                # Match on the name alone, but only if it is unique on the server
+                candidates = schemas_by_name.get(name.lower(), [])
+                if len(candidates) > 1:
+                    skipped.append(f"Skipped routine [{name}]: no schema in the workbook and it exists in "
+                                   f"several schemas ({', '.join(sorted(candidates))})")
+                    continue
+                schema = candidates[0] if candidates else ''
+            known_schema = bool(schema)
+            schema = schema or 'dbo'
+
+            if len(definition) >= EXCEL_CELL_LIMIT:
+                skipped.append(f"Skipped routine [{schema}].[{name}]: definition may be truncated by Excel")
+                continue
+
+            server_hash = server_hashes.get((schema.lower(), name.lower()))
+            if server_hash == routine_hash(definition):
+                continue
+
+            match = ROUTINE_HEADER_RE.match(definition)
+            if not match:
+                skipped.append(f"Skipped routine [{schema}].[{name}]: definition does not start with CREATE")
+                continue
+            sql = definition[:match.start(2)] + 'CREATE OR ALTER' + definition[match.end(2):]
+
+            # An unqualified name would be created in the login's default schema
+            header_end = match.start(2) + len('CREATE OR ALTER')
+            name_match = ROUTINE_NAME_RE.match(sql, header_end)
+            if known_schema and name_match and '.' not in name_match.group(2):
+                sql = sql[:name_match.start(2)] + f"[{schema}]." + sql[name_match.start(2):]
+
+            # After a deploy the server stores the CREATE OR ALTER text, so that counts as unchanged too
+            if server_hash == routine_hash(sql):
+                continue
+
+            # CREATE OR ALTER must be alone in its batch, so wrap it in sp_executesql
+            # to send many routines in one round trip.
+            escaped = sql.replace("'", "''")
+            changes.append({
+                'Table': f"{schema}.{name}", 'Column': '', 'Operation': 'ROUTINE',
+                'Detail': f"Deployed {str(row.type).strip().title()} [{schema}].[{name}]",
+                'SQL': sql,
+                'Batch': f"EXEC sys.sp_executesql N'{escaped}';",
+            })
+
+        for message in skipped:
+            print(message)
+        return changes, skipped
+
+    def _execute_changes(self, conn, changes, logs, progress=None):
+        """
+        Executes planned changes in order. Consecutive changes with a 'Batch' statement
+        are sent together, up to BATCH_MAX_STATEMENTS / BATCH_MAX_CHARS per round trip.
+        Raises on the first failure.
+        """
+        i = 0
+        while i < len(changes):
+            # Collect one round trip: a single plain change, or a run of batchable ones
+            j = i + 1
+            if 'Batch' in changes[i]:
+                size = len(changes[i]['Batch'])
+                while (j < len(changes) and 'Batch' in changes[j] and j - i < BATCH_MAX_STATEMENTS
+                       and size + len(changes[j]['Batch']) <= BATCH_MAX_CHARS):
+                    size += len(changes[j]['Batch'])
+                    j += 1
+
+            group = changes[i:j]
+            if progress:
+                for k in range(i, j): progress(k, 'Running', None)
+            started = time.perf_counter()
+            try:
+                if 'Batch' in group[0]:
+                    print(f"Executing batch of {len(group)} statement(s)")
+                    self._execute_batch(conn, "\n".join(c['Batch'] for c in group))
+                else:
+                    print(f"Executing: {group[0]['SQL']}")
+                    conn.execute(text(group[0]['SQL']))
+            except Exception:
+                if progress:
+                    elapsed = (time.perf_counter() - started) * 1000
+                    for k in range(i, j): progress(k, 'Failed', elapsed)
+                raise
+
+            # Time of a batch is amortized over its statements
+            elapsed = (time.perf_counter() - started) * 1000 / len(group)
+            for k in range(i, j):
+                if progress: progress(k, 'Done', elapsed)
+                logs.append(changes[k]['Detail'])
+            i = j
+
+    def _execute_batch(self, conn, sql):
+        """
+        Sends a multi-statement batch on the transaction's DBAPI connection.
+        Every result set is drained: pyodbc only raises the error of a later
+        statement when its result set is reached with nextset().
+        """
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(sql)
+            while cursor.nextset():
+                pass
+        finally:
+            cursor.close()
+
+    def sync_schema(self, excel_df, dry_run=False, on_plan=None, progress=None, routines_df=None,
+                    dependency_policy='warn', approved=None):
         """
         Syncs Excel schema changes to DB.
         Refactored to pre-fetch schema to avoid locking issues.
+
+        on_plan(changes) is called with the planned change list before anything is executed.
+        progress(index, status, elapsed_ms) is called per change while executing
+        (may be called from a worker thread). With dry_run=True nothing is executed.
+        routines_df (the Procedures_Functions sheet) deploys changed routine definitions.
+        dependency_policy: 'warn' reports ALTER / DROP changes that break dependent objects,
+        'block' refuses to run changes that break server-tracked column dependencies
+        (before any lock is taken), None skips the check.
+        approved: SQL list of a previewed plan; the sync is refused unless the fresh plan is identical.
         """
         if not self.engine: return False, ["Not connected."]
         
@@ -110,13 +608,46 @@ class DBManager:
         # We fetch everything first so we don't need to open new connections 
         # while holding a transaction lock later.
         try:
-            current_schemas = {}
-            tables = self.get_tables()
-            for t in tables:
-                current_schemas[t] = self.get_table_schema(t)
+            current_schemas = self._fetch_current_schemas()
+            server_hashes = self.get_routine_hashes() if routines_df is not None else {}
         except Exception as e:
             return False, [f"Error fetching current schema: {e}"]
 
+        graph = None
+        if dependency_policy:
+            try:
+                graph = self.get_dependency_graph().merged(
+                    self._routine_dependency_graph(routines_df, current_schemas))
+            except Exception as e:
+                if dependency_policy == 'block':
+                    return False, [f"Error fetching dependencies: {e}"]
+                print(f"Dependency check skipped: {e}")
+
+        try:
+            changes = self.plan_sync(excel_df, current_schemas)
+            # Routines last, so they can reference columns added above
+            routine_changes, skipped = self.plan_routines(routines_df, server_hashes)
+            changes += routine_changes
+        except Exception as e:
+            print(f"Sync Error: {e}")
+            return False, [f"Error planning sync: {e}"]
+
+        warnings, blocking = self.check_dependencies(changes, graph) if graph else ([], [])
+        # Skipped routines are reported with the result, so an edit that wasn't applied is never silent
+        warnings = skipped + warnings
+
+        if approved is not None and [c['SQL'] for c in changes] != list(approved):
+            return False, ["The workbook or database changed since the preview. Review the new preview before applying."]
+
+        if on_plan:
+            on_plan(changes)
+
+        if dry_run:
+            return True, [f"Warning: {w}" for w in warnings] + [c['Detail'] for c in changes] or ["No changes detected."]
+
+        if blocking and dependency_policy == 'block':
+            return False, [f"Blocked: {len(blocking)} change(s) would break dependent objects."] + blocking
+
         # 2. Start Transaction for updates
         with self.engine.connect() as conn:
             # Set lock timeout to avoid infinite hangs (e.g., 5 seconds)
@@ -127,100 +658,22 @@ class DBManager:
 
             trans = conn.begin()
             try:
-                # Group by table
-                excel_tables = excel_df['Table'].unique()
-                
-                for table_name, group in excel_df.groupby('Table'):
-                    
-                    # Fetch pre-loaded schema
-                    current_df = current_schemas.get(table_name)
-                    
-                    # If table logic needs to handle NEW TABLES (not implemented yet, but for safety)
-                    if current_df is None or current_df.empty: 
-                        # New table creation is complex, currently skipping or could implement CREATE TABLE
-                        # For now, skipping as per previous logic (only ALTER/ADD/DROP cols)
-                        continue 
-                    
-                    # Convert to dict for lookup
-                    curr_map = {row['Column Name']: row for _, row in current_df.iterrows()}
-                    
-                    for _, row in group.iterrows():
-                        col = row['Column Name']
-                        
-                        # -- Prepare New attributes (from Excel) --
-                        new_type = str(row['Data Type']).strip().upper()
-                        
-                        raw_new_len = str(row['Length']).strip()
-                        if raw_new_len.lower() in ['nan', 'none', '']: 
-                            new_len = ''
-                        else:
-                            try:
-                                new_len = str(int(float(raw_new_len)))
-                            except:
-                                new_len = raw_new_len
-                                
-                        # Construct type definition
-                        type_def = new_type
-                        if new_type in ['VARCHAR', 'NVARCHAR', 'CHAR', 'NCHAR', 'VARBINARY'] and new_len:
-                            type_def = f"{new_type}({new_len})"
-                        elif new_type in ['DECIMAL', 'NUMERIC'] and new_len:
-                            type_def = f"{new_type}({new_len})"
-
-                        # Nullability
-                        null_val = str(row['Allow Null']).strip().upper()
-                        null_def = "NULL" if null_val == 'Y' else "NOT NULL"
-
-                        # 1. ADD Column (If not in DB)
-                        if col not in curr_map:
-                            sql = f"ALTER TABLE [{table_name}] ADD [{col}] {type_def} {null_def}"
-                            print(f"Executing: {sql}")
-                            conn.execute(text(sql))
-                            logs.append(f"Added Column [{table_name}].[{col}] ({type_def})")
-                            continue
-                        
-                        # 2. MATCH/MODIFY Existing
-                        curr = curr_map[col]
-                        
-                        # -- Prepare Old attributes (from DB) --
-                        old_type = str(curr['Data Type']).strip().upper()
-                        
-                        raw_old_len = str(curr['Length']).strip()
-                        if raw_old_len.lower() in ['nan', 'none', '']:
-                            old_len = ''
-                        else:
-                            try:
-                                old_len = str(int(float(raw_old_len)))
-                            except:
-                                old_len = raw_old_len
-
-                        # Check differences
-                        types_with_len = ['VARCHAR', 'NVARCHAR', 'CHAR', 'NCHAR', 'VARBINARY']
-                        is_diff = False
-                        if new_type != old_type:
-                            is_diff = True
-                        elif new_type in types_with_len and new_len != old_len:
-                            is_diff = True
-                            
-                        if is_diff:
-                            sql = f"ALTER TABLE [{table_name}] ALTER COLUMN [{col}] {type_def} {null_def}"
-                            print(f"Executing: {sql}")
-                            conn.execute(text(sql))
-                            logs.append(f"Updated [{table_name}].[{col}]: {old_type}({old_len}) -> {type_def}")
-
-                    # 3. DROP Column (If in DB but not in Excel)
-                    excel_cols = set(group['Column Name'])
-                    db_cols = set(curr_map.keys())
-                    dropped_cols = db_cols - excel_cols
-                    
-                    for d_col in dropped_cols:
-                        sql = f"ALTER TABLE [{table_name}] DROP COLUMN [{d_col}]"
-                        print(f"Executing: {sql}")
-                        conn.execute(text(sql))
-                        logs.append(f"Dropped Column [{table_name}].[{d_col}]")
-                        
+                # On purpose for the whole transaction: any error (also inside a batch)
+                # stops execution and dooms the transaction
+                conn.exec_driver_sql("SET XACT_ABORT ON")
+                self._execute_changes(conn, changes, logs, progress)
                 trans.commit()
-                return True, logs if logs else ["No changes detected."]
+                return True, [f"Warning: {w}" for w in warnings] + logs or ["No changes detected."]
             except Exception as e:
                 trans.rollback()
+                if progress:
+                    for i in range(len(logs)):
+                        progress(i, 'Rolled Back', None)
                 print(f"Sync Error: {e}")
                 return False, [str(e)]
+            finally:
+                # Don't leave the option set on the pooled connection
+                try:
+                    conn.exec_driver_sql("SET XACT_ABORT OFF")
+                except Exception:
+                    pass
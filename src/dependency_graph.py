@@ -0,0 +1,84 @@
+class DependencyGraph:
+    """
+    Which views, procedures and functions depend on a table or a column.
+
+    Built from one bulk query over sys.sql_expression_dependencies plus parsing of
+    routine definitions (for column references the server only tracks for
+    schema-bound objects). Lookups are dict hits on precomputed sets, so checking a
+    planned change doesn't depend on the size of the catalog.
+    """
+    def __init__(self):
+        self.table_deps = {}    # table (lower) -> set of dependent object labels
+        self.column_deps = {}   # (table, column) (lower) -> set of dependent object labels
+        self.exact_deps = {}    # (table, column) (lower) -> labels tracked by the server itself
+        self.bound_deps = {}    # (table, column) (lower) -> schema-bound labels (block any ALTER COLUMN)
+        self.column_aware = {}  # table (lower) -> labels whose column references to it are known
+        self.unknown_deps = {}  # table (lower) -> labels referencing it without known column references
+
+    def add(self, label, table, column=None, exact=False, bound=False):
+        table = table.lower()
+        self.table_deps.setdefault(table, set()).add(label)
+        if column:
+            key = (table, column.lower())
+            self.column_deps.setdefault(key, set()).add(label)
+            self.column_aware.setdefault(table, set()).add(label)
+            self.unknown_deps.get(table, set()).discard(label)
+            if exact:
+                self.exact_deps.setdefault(key, set()).add(label)
+            if bound:
+                self.bound_deps.setdefault(key, set()).add(label)
+        elif label not in self.column_aware.get(table, ()):
+            self.unknown_deps.setdefault(table, set()).add(label)
+
+    def add_rows(self, rows):
+        """
+        Adds (ref_schema, ref_name, ref_type, table, column, is_schema_bound) rows
+        from sys.sql_expression_dependencies.
+        """
+        for ref_schema, ref_name, ref_type, table, column, is_schema_bound in rows:
+            if not ref_name or not table:
+                continue
+            self.add(f"{ref_type} [{ref_schema}].[{ref_name}]", table, column,
+                     exact=True, bound=bool(is_schema_bound))
+
+    def add_definition(self, label, tokens, columns_by_table):
+        """
+        Adds the references found in a routine definition's identifier tokens.
+        A column counts as referenced when both its table and its name appear in the definition.
+        If none of a table's columns appear (e.g. SELECT *), only the table edge is added.
+        """
+        for table in tokens.intersection(columns_by_table):
+            self.add(label, table)
+            for column in tokens.intersection(columns_by_table[table]):
+                self.add(label, table, column)
+
+    def impact(self, table, column, widening=False):
+        """
+        Objects that may break if a column is altered or dropped, as (exact, possible):
+        exact are column edges tracked by the server; possible are parsed column edges plus
+        objects that reference the table without known column references (views, triggers
+        and routines that are not schema-bound).
+        A widening ALTER only breaks schema-bound objects, which SQL Server refuses to alter under.
+        """
+        table = table.lower()
+        key = (table, column.lower())
+        if widening:
+            return self.bound_deps.get(key, set()), set()
+        exact = self.exact_deps.get(key, set())
+        possible = (self.column_deps.get(key, set()) | self.unknown_deps.get(table, set())) - exact
+        return exact, possible
+
+    def merged(self, other):
+        """Returns a new graph with the edges of both."""
+        graph = DependencyGraph()
+        for source in (self, other):
+            for attr in ('table_deps', 'column_deps', 'exact_deps', 'bound_deps', 'column_aware'):
+                target = getattr(graph, attr)
+                for key, labels in getattr(source, attr).items():
+                    target.setdefault(key, set()).update(labels)
+        # An object known column-wise in either graph is no longer a table-level fallback
+        for table, labels in graph.table_deps.items():
+            unknown = labels - graph.column_aware.get(table, set())
+            if unknown:
+                graph.unknown_deps[table] = unknown
+        return graph
@@ -1,8 +1,43 @@
 
 import pandas as pd
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from openpyxl.utils import get_column_letter
 
+SCHEMA_COLUMNS = ['Table', 'Column Name', 'Data Type', 'Length', 'PK', 'Allow Null', 'Default Value']
+INDEX_SHEET = 'Index'
+ROUTINES_PER_SHARD = 2000
+SHARD_MODES = ['prefix', 'rows']
+
+
+def _write_workbook(job):
+    """Process pool worker: writes {sheet_name: DataFrame} to one formatted workbook."""
+    filename, sheets = job
+    handler = ExcelHandler(filename=filename)
+    with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+        for sheet_name, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            handler._apply_formatting(writer.sheets[sheet_name])
+    return filename
+
+
+def _read_sheets(job):
+    """Process pool worker: reads a list of sheets from one workbook as strings."""
+    filename, sheet_names = job
+    dfs = pd.read_excel(filename, sheet_name=sheet_names, dtype=str)
+    return [dfs[name] for name in sheet_names]
+
+
+def _map(func, jobs, max_workers):
+    """Runs jobs on a process pool, or inline when there is only one."""
+    if len(jobs) <= 1:
+        return [func(job) for job in jobs]
+    workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, jobs))
+
+
 class ExcelHandler:
     def __init__(self, filename="ExcelDBManager.xlsx"):
         self.filename = filename
@@ -16,7 +51,7 @@ class ExcelHandler:
             # User wants: Column Size, PK, Default, Type separately
             # My extracted DF has: Table, Column Name, Data Type, Length, PK, Allow Null, Default Value
             
-            desired_order = ['Table', 'Column Name', 'Data Type', 'Length', 'PK', 'Allow Null', 'Default Value']
+            desired_order = SCHEMA_COLUMNS
             # Filter cols that exist
             final_cols = [c for c in desired_order if c in schema_df.columns]
             
@@ -64,19 +99,200 @@ class ExcelHandler:
             
             worksheet.column_dimensions[column_letter].width = adjusted_width
 
+    def export_sharded(self, schema_df, routines_df, shard_by='prefix', rows_per_shard=50000,
+                       separate_workbooks=True, prefix_sep='_', max_workers=None):
+        """
+        Splits the export into shards and writes a small index workbook (self.filename) linking them.
+
+        shard_by: 'prefix' (table name up to prefix_sep) or 'rows' (row budget only).
+        Every shard also respects rows_per_shard; a table is never split across shards.
+        With separate_workbooks, each shard is its own workbook (with a normal 'Schema' sheet,
+        so it can be synced on its own) and shards are written in parallel on a process pool.
+        Otherwise shards become sheets of the index workbook, written sequentially.
+        Returns (success, message, shard file paths).
+        """
+        try:
+            if shard_by not in SHARD_MODES:
+                raise ValueError(f"Unknown shard mode: {shard_by}")
+
+            final_cols = [c for c in SCHEMA_COLUMNS if c in schema_df.columns] or list(schema_df.columns)
+            taken = set()  # shard names in use (lower-case: file names are case-insensitive on Windows)
+            shards = self._split_shards(schema_df, shard_by, rows_per_shard, prefix_sep, taken) if not schema_df.empty else []
+
+            routine_shards = []
+            if routines_df is not None and not routines_df.empty:
+                for start in range(0, len(routines_df), ROUTINES_PER_SHARD):
+                    part = start // ROUTINES_PER_SHARD + 1
+                    name = self._unique_name(f"routines_{part:03d}", taken)
+                    routine_shards.append((name, routines_df.iloc[start:start + ROUTINES_PER_SHARD]))
+
+            base, ext = os.path.splitext(self.filename)
+            directory = os.path.dirname(os.path.abspath(self.filename))
+            index_rows = []
+            jobs = []
+
+            for kind, sheet, items in (('Schema', 'Schema', shards), ('Routines', 'Procedures_Functions', routine_shards)):
+                for name, df in items:
+                    # Index counts: tables for schema shards, routines for routine shards
+                    counts = {'Tables': df['Table'].nunique(), 'Routines': ''} if kind == 'Schema' \
+                        else {'Tables': '', 'Routines': len(df)}
+                    data = df[final_cols] if kind == 'Schema' else df
+                    if separate_workbooks:
+                        shard_file = f"{base}_{name}{ext}"
+                        jobs.append((shard_file, {sheet: data}))
+                        index_rows.append({'Kind': kind, 'Shard': name, 'File': os.path.basename(shard_file),
+                                           'Sheet': sheet, **counts, 'Rows': len(df)})
+                    else:
+                        sheet_name = self._sheet_name(f"{sheet[:6]}_{name}", [r['Sheet'] for r in index_rows])
+                        jobs.append((sheet_name, data))
+                        index_rows.append({'Kind': kind, 'Shard': name, 'File': '',
+                                           'Sheet': sheet_name, **counts, 'Rows': len(df)})
+
+            # Two shards must never write the same workbook
+            files = [r['File'].lower() for r in index_rows if r['File']]
+            if len(files) != len(set(files)):
+                raise ValueError("Duplicate shard file names")
+
+            if separate_workbooks:
+                shard_files = [os.path.join(directory, f) for f in _map(_write_workbook, jobs, max_workers)]
+            else:
+                shard_files = []
+
+            # Index workbook (plus the shard sheets in single-workbook mode)
+            index_df = pd.DataFrame(index_rows, columns=['Kind', 'Shard', 'File', 'Sheet', 'Tables', 'Routines', 'Rows'])
+            with pd.ExcelWriter(self.filename, engine='openpyxl') as writer:
+                index_df.to_excel(writer, sheet_name=INDEX_SHEET, index=False)
+                worksheet = writer.sheets[INDEX_SHEET]
+                for i, row in enumerate(index_rows, start=2):
+                    if row['File']:
+                        worksheet.cell(row=i, column=3).hyperlink = row['File']
+                    else:
+                        worksheet.cell(row=i, column=4).hyperlink = f"#'{row['Sheet']}'!A1"
+                self._apply_formatting(worksheet)
+
+                if not separate_workbooks:
+                    for sheet_name, data in jobs:
+                        data.to_excel(writer, sheet_name=sheet_name, index=False)
+                        self._apply_formatting(writer.sheets[sheet_name])
+
+            return True, f"Successfully exported {len(index_rows)} shard(s), index: {self.filename}", shard_files
+        except Exception as e:
+            return False, f"Export failed: {e}", []
+
+    def _split_shards(self, schema_df, shard_by, rows_per_shard, prefix_sep, taken):
+        """Returns [(shard name, DataFrame)], keeping each table's rows together. Names are added to `taken`."""
+        if shard_by == 'prefix':
+            keys = schema_df['Table'].astype(str).str.split(prefix_sep, n=1).str[0].str.upper()
+        else:
+            keys = pd.Series('part', index=schema_df.index)
+
+        shards = []
+        for key, group in schema_df.groupby(keys, sort=True):
+            # Pack whole tables into parts of at most rows_per_shard rows
+            part_of = {}
+            part, count = 1, 0
+            for table, size in group.groupby('Table', sort=False).size().items():
+                if count and count + size > rows_per_shard:
+                    part, count = part + 1, 0
+                part_of[table] = part
+                count += size
+
+            safe_key = re.sub(r'[^\w\-]', '_', str(key)) or 'shard'
+            parts = group.groupby(group['Table'].map(part_of), sort=True)
+            for part, part_df in parts:
+                name = safe_key if len(parts) == 1 and shard_by != 'rows' else f"{safe_key}_{part:03d}"
+                # Different keys can sanitize to the same name (e.g. 'A.B' and 'A B')
+                shards.append((self._unique_name(name, taken), part_df))
+        return shards
+
+    def _unique_name(self, name, taken):
+        """Appends a numeric suffix until the name (case-insensitive) is not in `taken`, then reserves it."""
+        candidate, n = name, 1
+        while candidate.lower() in taken:
+            n += 1
+            candidate = f"{name}_{n}"
+        taken.add(candidate.lower())
+        return candidate
+
+    def _sheet_name(self, name, taken):
+        """Excel sheet names: max 31 chars, no []:*?/\\ and unique."""
+        name = re.sub(r'[\[\]:*?/\\]', '_', name)[:31]
+        candidate, n = name, 1
+        while candidate in taken or candidate == INDEX_SHEET:
+            n += 1
+            candidate = f"{name[:27]}_{n}"
+        return candidate
+
+    def _read_sharded(self, xl, kind, max_workers=None):
+        """
+        Reads every shard of one kind ('Schema' / 'Routines') listed in the index workbook.
+        Shard workbooks are read in parallel. Returns None if this is not an index workbook.
+        """
+        if INDEX_SHEET not in xl.sheet_names:
+            return None
+
+        index_df = xl.parse(INDEX_SHEET, dtype=str).fillna('')
+        index_df = index_df[index_df['Kind'] == kind]
+
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        local_sheets = []
+        jobs = {}
+        for row in index_df.itertuples(index=False):
+            if row.File:
+                jobs.setdefault(os.path.join(directory, row.File), []).append(row.Sheet)
+            else:
+                local_sheets.append(row.Sheet)
+
+        dfs = [xl.parse(sheet, dtype=str) for sheet in local_sheets]
+        for result in _map(_read_sheets, list(jobs.items()), max_workers):
+            dfs.extend(result)
+
+        if not dfs:
+            return pd.DataFrame()
+        return pd.concat(dfs, ignore_index=True)
+
     def read_schema(self):
         """
         Reads the 'Schema' sheet back from Excel.
+        For a sharded export (index workbook), all schema shards are read in parallel and combined.
+        A routine shard (only a 'Procedures_Functions' sheet) has an empty schema.
         """
         if not os.path.exists(self.filename):
             return None
         
         try:
-            # Read all as string to prevent auto-conversion issues
-            df = pd.read_excel(self.filename, sheet_name='Schema', dtype=str)
+            with pd.ExcelFile(self.filename) as xl:
+                df = self._read_sharded(xl, 'Schema')
+                if df is None and 'Schema' not in xl.sheet_names and 'Procedures_Functions' in xl.sheet_names:
+                    df = pd.DataFrame(columns=SCHEMA_COLUMNS)
+                elif df is None:
+                    # Read all as string to prevent auto-conversion issues
+                    df = xl.parse('Schema', dtype=str)
             # Nan handling
             df.fillna('', inplace=True)
             return df
         except Exception as e:
             print(f"Error reading excel: {e}")
             return None
+
+    def read_routines(self):
+        """
+        Reads the 'Procedures_Functions' sheet back from Excel (or all routine shards).
+        Returns None if the file or sheet does not exist.
+        """
+        if not os.path.exists(self.filename):
+            return None
+
+        try:
+            with pd.ExcelFile(self.filename) as xl:
+                df = self._read_sharded(xl, 'Routines')
+                if df is None:
+                    df = xl.parse('Procedures_Functions', dtype=str)
+            df.fillna('', inplace=True)
+            return df
+        except ValueError:
+            # Sheet not found (no routines exported)
+            return None
+        except Exception as e:
+            print(f"Error reading routines: {e}")
+            return None
@@ -1,47 +1,78 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                            QLabel, QLineEdit, QPushButton, QMessageBox, QDialog, QFormLayout, QCheckBox)
+                            QLabel, QLineEdit, QPushButton, QMessageBox, QDialog, QFormLayout, QCheckBox,
+                            QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
+                            QTableView, QComboBox, QListWidget)
 from PyQt6.QtGui import QIcon, QPixmap
 from PyQt6.QtCore import Qt
-from src.db_manager import DBManager
 from src.excel_handler import ExcelHandler
-from src.crypto_utils import CryptoManager
-import configparser
+from src.profile_manager import ProfileManager, ConnectionCache
+from src.watch_service import (WatchService, SyncQueue, PRIORITY_MANUAL, PRIORITY_AUTO,
+                               JOB_AUTO, JOB_PREVIEW, JOB_APPLY)
+from src.sync_model import SyncChangesModel, SyncRun
+from src.search_index import SearchIndex
 import os
 import time
 from datetime import datetime
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QTimer, pyqtSignal
 
 CONFIG_FILE = "config.ini"
+NEW_PROFILE = "<New Profile>"
 
-class ExcelFileHandler(FileSystemEventHandler, QObject):
-    file_modified = pyqtSignal()
+class SyncStatusPanel(QTableWidget):
+    """Shows pending / running / last sync state for each watched workbook."""
+    COLUMNS = ['File', 'Database', 'State', 'Last Sync']
 
-    def __init__(self, filename):
-        super().__init__()
-        # Store absolute path for robust comparison
-        self.filename = os.path.abspath(filename)
-        self.last_modified = time.time()
-
-    def on_modified(self, event):
-        if event.is_directory:
+    def __init__(self, parent=None):
+        super().__init__(0, len(self.COLUMNS), parent)
+        self.setHorizontalHeaderLabels(self.COLUMNS)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.verticalHeader().setVisible(False)
+        self.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self._rows = {}  # path -> row index
+
+    def add_file(self, path, db_name):
+        row = self._rows.get(path)
+        if row is None:
+            row = self.rowCount()
+            self.insertRow(row)
+            self._rows[path] = row
+            item = QTableWidgetItem(os.path.basename(path))
+            item.setToolTip(path)
+            item.setData(Qt.ItemDataRole.UserRole, path)
+            self.setItem(row, 0, item)
+            self.setItem(row, 2, QTableWidgetItem("Idle"))
+            self.setItem(row, 3, QTableWidgetItem("-"))
+        self.setItem(row, 1, QTableWidgetItem(db_name))
+
+    def set_state(self, path, state):
+        row = self._rows.get(path)
+        if row is not None:
+            self.setItem(row, 2, QTableWidgetItem(state))
+
+    def set_last_sync(self, path, success, summary):
+        row = self._rows.get(path)
+        if row is None:
             return
-            
-        # Check if the modified file matches our target
-        if os.path.abspath(event.src_path) == self.filename:
-            # Debounce: Prevent double events (which happen often with Excel)
-            current_time = time.time()
-            if current_time - self.last_modified > 1.0:
-                self.last_modified = current_time
-                # Emit signal to GUI thread
-                self.file_modified.emit()
+        result = "OK" if success else "Failed"
+        item = QTableWidgetItem(f"{datetime.now().strftime('%H:%M:%S')} {result}")
+        item.setToolTip(summary)
+        self.setItem(row, 2, QTableWidgetItem("Idle"))
+        self.setItem(row, 3, item)
+
+    def selected_file(self):
+        items = self.selectedItems()
+        if not items:
+            return None
+        return self.item(items[0].row(), 0).data(Qt.ItemDataRole.UserRole)
 
 class LoginDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("MSSQL Database Connection")
-        self.setFixedSize(400, 300)
+        self.setFixedSize(400, 360)
         
         # Set Icon
         # Prioritize local file (dist folder) then dev path
@@ -56,6 +87,7 @@ class LoginDialog(QDialog):
              self.setWindowIcon(QIcon(logo_path))
 
         self.db_manager = None
+        self.profile_name = None
         self.center_window()
 
     def center_window(self):
@@ -67,6 +99,10 @@ class LoginDialog(QDialog):
         layout = QVBoxLayout()
         form_layout = QFormLayout()
 
+        self.profile_combo = QComboBox()
+        self.profile_combo.currentTextChanged.connect(self.on_profile_selected)
+        self.name_input = QLineEdit()
+        self.name_input.setPlaceholderText("Profile name (defaults to database)")
         self.server_input = QLineEdit()
         self.server_input.setPlaceholderText("e.g. localhost or IP")
         self.db_input = QLineEdit()
@@ -77,6 +113,8 @@ class LoginDialog(QDialog):
         self.password_input.setEchoMode(QLineEdit.EchoMode.Password)
         self.password_input.setPlaceholderText("Password")
 
+        form_layout.addRow("Profile:", self.profile_combo)
+        form_layout.addRow("Name:", self.name_input)
         form_layout.addRow("Server:", self.server_input)
         form_layout.addRow("Database:", self.db_input)
         form_layout.addRow("User:", self.user_input)
@@ -98,69 +136,209 @@ class LoginDialog(QDialog):
         self.load_config()
 
     def load_config(self):
-        config = configparser.ConfigParser()
-        if os.path.exists(CONFIG_FILE):
-            config.read(CONFIG_FILE)
-            if 'MSSQL' in config:
-                self.user_input.setText(config['MSSQL'].get('User', ''))
-                
-                # Decrypt password and other fields if they are encrypted
-                # For this transition, we'll try to decrypt, if empty (meaning it was plain text or invalid),
-                # we might need to handle it. But per request, we assume full encryption.
-                # Let's fully implement decryption here.
-                
-                crypto = CryptoManager()
-                
-                # Helper to safely get and decrypt
-                def get_decrypted(key):
-                    val = config['MSSQL'].get(key, '')
-                    decrypted = crypto.decrypt(val)
-                    # Fallback: if decryption returns empty but val wasn't, it might be legacy plain text.
-                    # Ideally we migrate. For now let's show decrypted.
-                    return decrypted if decrypted else val
-
-                self.server_input.setText(get_decrypted('Server'))
-                self.db_input.setText(get_decrypted('Database'))
-                self.user_input.setText(get_decrypted('User'))
-                self.password_input.setText(get_decrypted('Password'))
-
-    def save_config(self, server, db, user, password):
-        config = configparser.ConfigParser()
-        crypto = CryptoManager()
-        
-        config['MSSQL'] = {
-            'Server': crypto.encrypt(server),
-            'Database': crypto.encrypt(db),
-            'User': crypto.encrypt(user),
-            'Password': crypto.encrypt(password)
-        }
-        with open(CONFIG_FILE, 'w') as configfile:
-            config.write(configfile)
+        # Profiles are decrypted once here and reused by MainWindow for switching
+        self.profile_manager = ProfileManager(CONFIG_FILE)
+        self.connections = ConnectionCache()
+
+        self.profile_combo.blockSignals(True)
+        self.profile_combo.addItem(NEW_PROFILE)
+        self.profile_combo.addItems(self.profile_manager.names())
+        self.profile_combo.blockSignals(False)
+
+        if self.profile_manager.last_profile:
+            self.profile_combo.setCurrentText(self.profile_manager.last_profile)
+        self.on_profile_selected(self.profile_combo.currentText())
+
+    def on_profile_selected(self, name):
+        profile = self.profile_manager.get(name) if name != NEW_PROFILE else None
+        if not profile:
+            for field in (self.name_input, self.server_input, self.db_input, self.user_input, self.password_input):
+                field.clear()
+            return
+
+        self.name_input.setText(name)
+        self.server_input.setText(profile['Server'])
+        self.db_input.setText(profile['Database'])
+        self.user_input.setText(profile['User'])
+        self.password_input.setText(profile['Password'])
 
     def try_connect(self):
         server = self.server_input.text()
         db = self.db_input.text()
         user = self.user_input.text()
         password = self.password_input.text()
+        name = self.name_input.text().strip() or db
 
         if not all([server, db, user, password]):
             QMessageBox.warning(self, "Input Error", "All fields are required.")
             return
 
-        manager = DBManager(server, db, user, password)
-        success, error_msg = manager.connect()
-        if success:
+        profile = {'Server': server, 'Database': db, 'User': user, 'Password': password}
+        manager, error_msg = self.connections.get(name, profile)
+        if manager:
             self.db_manager = manager
-            self.save_config(server, db, user, password)
+            self.profile_name = name
+            self.profile_manager.save_profile(name, server, db, user, password)
             QMessageBox.information(self, "Success", "Connected to database!")
             self.accept()
         else:
             QMessageBox.critical(self, "Connection Failed", f"Could not connect to database.\n\nError Details:\n{error_msg}\n\nPlease check your credentials and server status.")
 
+class SyncPreviewDialog(QDialog):
+    """
+    Preview of the planned changes for one workbook, then live status while they are applied.
+    Backed by SyncChangesModel so it stays responsive with hundreds of thousands of rows.
+    """
+    run_ready = pyqtSignal(object, str)  # SyncRun, job kind
+    OPERATIONS = ['All', 'CREATE', 'ADD', 'ALTER', 'DROP', 'ROUTINE']
+
+    def __init__(self, path, on_apply, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.on_apply = on_apply
+        self.busy = False
+        self.planned = None  # SQL of the previewed plan; Apply only runs exactly this
+        self.setWindowTitle(f"Sync Preview - {os.path.basename(path)}")
+        self.resize(1000, 600)
+
+        layout = QVBoxLayout(self)
+
+        self.summary_label = QLabel("Planning changes...")
+        layout.addWidget(self.summary_label)
+
+        filter_layout = QHBoxLayout()
+        self.table_filter = QLineEdit()
+        self.table_filter.setPlaceholderText("Filter by table")
+        self.operation_filter = QComboBox()
+        self.operation_filter.addItems(self.OPERATIONS)
+        filter_layout.addWidget(self.table_filter)
+        filter_layout.addWidget(self.operation_filter)
+        layout.addLayout(filter_layout)
+
+        self.model = SyncChangesModel(self)
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.setSortingEnabled(True)
+        self.view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.view.verticalHeader().setVisible(False)
+        # Fixed row heights keep scrolling O(1) regardless of row count
+        self.view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.view.horizontalHeader().setSectionResizeMode(4, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.view)
+
+        btn_layout = QHBoxLayout()
+        self.apply_btn = QPushButton("Apply to Database")
+        self.apply_btn.setEnabled(False)
+        self.apply_btn.clicked.connect(self.apply)
+        self.close_btn = QPushButton("Close")
+        self.close_btn.clicked.connect(self.close)
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.apply_btn)
+        btn_layout.addWidget(self.close_btn)
+        layout.addLayout(btn_layout)
+
+        # Debounce filter typing; rebuilding the order touches every change
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(250)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.table_filter.textChanged.connect(self.filter_timer.start)
+        self.operation_filter.currentIndexChanged.connect(self.apply_filter)
+
+        self.run_ready.connect(self.on_run_ready)
+
+    def reset(self):
+        self.planned = None
+        self.apply_btn.setEnabled(False)
+        self.summary_label.setText("Planning changes...")
+        self.model.set_run(SyncRun([]))
+
+    def sync_callbacks(self, kind):
+        """Returns (on_plan, progress) callbacks for DBManager.sync_schema, used on the sync worker thread."""
+        holder = {}
+
+        def on_plan(changes):
+            holder['run'] = SyncRun(changes)
+            self.run_ready.emit(holder['run'], kind)
+
+        def progress(index, status, elapsed_ms):
+            holder['run'].record_progress(index, status, elapsed_ms)
+
+        return on_plan, progress
+
+    def on_run_ready(self, run, kind):
+        if kind == JOB_PREVIEW:
+            self.planned = [c['SQL'] for c in run.changes]
+        self.model.set_run(run)
+        self.apply_filter()
+        verb = "Applying" if kind == JOB_APPLY else "Planned"
+        self.summary_label.setText(f"{verb} {len(run.changes)} change(s)")
+
+    def apply_filter(self):
+        operation = self.operation_filter.currentText()
+        self.model.set_filter(self.table_filter.text(), '' if operation == 'All' else operation)
+
+    def apply(self):
+        reply = QMessageBox.question(self, 'Sync Confirmation', 
+                                     "This will update the database schema based on the Excel file.\n"
+                                     "Are you sure you want to proceed?",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, 
+                                     QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.No:
+            return
+
+        self.busy = True
+        self.apply_btn.setEnabled(False)
+        self.summary_label.setText("Applying changes...")
+        self.on_apply(self)
+
+    def skipped_text(self, logs):
+        """Summary suffix for routines the sync skipped; details go to the label's tooltip."""
+        skipped = [log[len("Warning: "):] for log in logs if log.startswith("Warning: Skipped")]
+        self.summary_label.setToolTip("\n".join(skipped))
+        return f" - {len(skipped)} routine(s) skipped (hover for details)" if skipped else ""
+
+    def on_finished(self, kind, success, logs):
+        if kind == JOB_PREVIEW:
+            # Dry run finished
+            if success:
+                count = self.model.change_count()
+                impacted = self.model.impact_count()
+                text = f"Planned {count} change(s)"
+                if impacted:
+                    text += f" - {impacted} may break dependent objects (see Impact column)"
+                self.summary_label.setText(text + self.skipped_text(logs))
+                self.apply_btn.setEnabled(count > 0 and self.planned is not None)
+            else:
+                self.summary_label.setText(f"Planning failed: {logs[0]}")
+            return
+
+        self.busy = False
+        counts = self.model.status_counts()
+        parts = [f"{k}: {v}" for k, v in sorted(counts.items())]
+        if success:
+            self.summary_label.setText("Database updated successfully. " + ", ".join(parts) + self.skipped_text(logs))
+        else:
+            self.summary_label.setText(f"Sync failed: {logs[0]}  ({', '.join(parts)})")
+
 class MainWindow(QMainWindow):
-    def __init__(self, db_manager):
+    # Export mode label -> ExcelHandler.export_sharded (shard_by, separate_workbooks) (None = single workbook)
+    EXPORT_MODES = {
+        "Single Workbook": None,
+        "Shard by Prefix": ('prefix', True),
+        "Shard by Rows": ('rows', True),
+        "Sheets by Prefix": ('prefix', False),
+        "Sheets by Rows": ('rows', False),
+    }
+    search_index_ready = pyqtSignal(str, int, object, str)  # connection string, generation, SearchIndex, error
+
+    def __init__(self, db_manager, profile_manager=None, connections=None, profile_name=None):
         super().__init__()
         self.db_manager = db_manager
+        self.profile_manager = profile_manager or ProfileManager(CONFIG_FILE)
+        self.connections = connections or ConnectionCache()
+        self.profile_name = profile_name
         self.setWindowTitle("Excel DB Manager")
         
         # Set Icon
@@ -171,7 +349,7 @@ class MainWindow(QMainWindow):
         else:
             self.setWindowIcon(QIcon("src/assets/logo.png"))
             
-        self.setGeometry(100, 100, 800, 600)
+        self.setGeometry(100, 100, 900, 800)
         self.center_window()   
 
     # 폼이 모니터 가운데에 위치..   
@@ -216,12 +394,22 @@ class MainWindow(QMainWindow):
         except:
             db_name = "Unknown DB"
             
-        conn_label = QLabel(f"Connected to: {db_name}") 
-        conn_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        conn_label.setStyleSheet("color: #888; font-size: 10pt;")
-        layout.addWidget(conn_label)
-        
-        layout.addStretch()
+        self.conn_label = QLabel(f"Connected to: {db_name}") 
+        self.conn_label.setStyleSheet("color: #888; font-size: 10pt;")
+
+        # Profile switcher: cached connections make switching instant
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItems(self.profile_manager.names())
+        if self.profile_name:
+            self.profile_combo.setCurrentText(self.profile_name)
+        self.profile_combo.currentTextChanged.connect(self.switch_profile)
+
+        conn_layout = QHBoxLayout()
+        conn_layout.addStretch()
+        conn_layout.addWidget(self.conn_label)
+        conn_layout.addWidget(self.profile_combo)
+        conn_layout.addStretch()
+        layout.addLayout(conn_layout)
 
         # Action Buttons
         btn_layout = QHBoxLayout()
@@ -240,24 +428,94 @@ class MainWindow(QMainWindow):
         self.auto_sync_chk.setStyleSheet("color: #e0e0e0; font-weight: bold;")
         self.auto_sync_chk.setToolTip("Automatically sync to DB when Excel file is saved.")
         
+        # Export Mode (single workbook or sharded)
+        self.export_mode_combo = QComboBox()
+        self.export_mode_combo.addItems(list(self.EXPORT_MODES.keys()))
+        self.export_mode_combo.setToolTip("Split huge catalogs into several workbooks generated in parallel (Shard),\n"
+                                          "or into several sheets of one workbook (Sheets).")
+        
         btn_layout.addWidget(self.export_btn)
+        btn_layout.addWidget(self.export_mode_combo)
         btn_layout.addWidget(self.sync_btn)
         btn_layout.addWidget(self.auto_sync_chk)
         
         layout.addLayout(btn_layout)
 
+        # Search over tables, columns and routine definitions
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search tables, columns, procedures... (prefix or substring)")
+        self.search_results = QListWidget()
+        self.search_results.setMinimumHeight(120)
+        layout.addWidget(self.search_input)
+        layout.addWidget(self.search_results)
+
+        # Debounce typing
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+
+        # Watched workbooks (pending / running / last sync per file)
+        self.sync_panel = SyncStatusPanel()
+        self.sync_panel.setMinimumHeight(120)
+        layout.addWidget(self.sync_panel)
+
         self.statusBar().showMessage("Ready")
         
-        # Watchdog Observer
-        self.observer = None
-        self.watcher_handler = None
+        # One shared observer for every exported workbook, and a sync queue
+        # that serializes per database but runs different databases in parallel
+        self.watch_service = WatchService()
+        self.watch_service.file_modified.connect(self.on_file_saved)
+        self.sync_queue = SyncQueue()
+        self.sync_queue.status_changed.connect(self.sync_panel.set_state)
+        self.sync_queue.sync_finished.connect(self.on_sync_finished)
         self.current_excel_file = None
+        self.preview_dialogs = {}  # path -> open SyncPreviewDialog
+        self.search_indexes = {}     # connection string -> SearchIndex
+        self.search_generation = {}  # connection string -> bumped whenever a sync changes the DB
+        self.search_building = set() # (connection string, generation) being built
+        # Indexes are built off the GUI thread; a huge catalog takes seconds
+        self.index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-index")
+        self.search_index_ready.connect(self.on_search_index_ready)
+
+        # Periodically release pools of profiles that haven't been used for a while
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setInterval(60 * 1000)
+        self.idle_timer.timeout.connect(lambda: self.connections.evict_idle(keep=self.db_manager))
+        self.idle_timer.start()
+
+    def switch_profile(self, name):
+        profile = self.profile_manager.get(name)
+        if not profile or name == self.profile_name:
+            return
+
+        self.statusBar().showMessage(f"Switching to {name}...")
+        manager, error_msg = self.connections.get(name, profile)
+        if not manager:
+            QMessageBox.critical(self, "Connection Failed", f"Could not connect to database.\n\nError Details:\n{error_msg}")
+            # Revert selection
+            self.profile_combo.blockSignals(True)
+            self.profile_combo.setCurrentText(self.profile_name or '')
+            self.profile_combo.blockSignals(False)
+            self.statusBar().showMessage("Ready")
+            return
+
+        # Already watched workbooks keep syncing to the DB they were exported from
+        self.db_manager = manager
+        self.profile_name = name
+        self.profile_manager.set_last_profile(name)
+        self.conn_label.setText(f"Connected to: {manager.database}")
+        self.statusBar().showMessage(f"Switched to {name}")
+        if self.search_input.text().strip():
+            self.run_search()
 
     def export_schema(self):
         self.statusBar().showMessage("Exporting schema...")
         
         try:
-            # 1. Fetch Data
+            # 1. Fetch Data (stamp first, so a change made meanwhile invalidates the search cache)
+            stamp = self.db_manager.get_catalog_stamp()
             schema_df = self.db_manager.get_all_schemas()
             routines_df = self.db_manager.get_procedures_and_functions()
             
@@ -275,13 +533,28 @@ class MainWindow(QMainWindow):
             filename = f"{db_name}_{timestamp}.xlsx"
 
             handler = ExcelHandler(filename=filename)
-            success, msg = handler.export_schema(schema_df, routines_df)
+            mode = self.EXPORT_MODES[self.export_mode_combo.currentText()]
+            shard_files = []
+            if mode:
+                # Sharded: one workbook per shard (generated on a process pool) or one sheet per shard,
+                # plus an index
+                shard_by, separate_workbooks = mode
+                success, msg, shard_files = handler.export_sharded(schema_df, routines_df, shard_by=shard_by,
+                                                                   separate_workbooks=separate_workbooks)
+            else:
+                success, msg = handler.export_schema(schema_df, routines_df)
             
             if success:
+                # Index the fetched catalog in the background and cache it next to the workbook
+                self.build_search_index(self.db_manager, workbook=filename,
+                                        frames=(schema_df, routines_df), stamp=stamp)
+
                 QMessageBox.information(self, "Export Successful", msg)
                 self.statusBar().showMessage("Export Completed")
                 
-                # Start Watching
+                # Start Watching (each shard can be synced on its own; the index syncs all of them)
+                for shard_file in shard_files:
+                    self.start_watching(shard_file)
                 self.start_watching(filename)
                 
                 # Auto-open the file
@@ -297,89 +570,206 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "Error", f"An unexpected error occurred: {e}")
             self.statusBar().showMessage("Error")
 
+    def get_search_index(self):
+        """Search index of the current DB, or None while it is being built in the background."""
+        search_index = self.search_indexes.get(self.db_manager.connection_string)
+        if search_index is None:
+            self.build_search_index(self.db_manager)
+        return search_index
+
+    def search_cache_workbook(self, db_manager):
+        """Most recent watched workbook of a DB; its search cache is stored next to it."""
+        for path in [self.current_excel_file] + self.watch_service.watched_files()[::-1]:
+            if path and self.watch_service.db_manager_for(path) is db_manager:
+                return path
+        return None
+
+    def build_search_index(self, db_manager, workbook=None, frames=None, stamp=None):
+        """
+        Loads or builds a DB's search index on a worker thread; on_search_index_ready stores it.
+        frames: (schema_df, routines_df) already fetched (by an export) with their catalog stamp.
+        """
+        key = db_manager.connection_string
+        generation = self.search_generation.get(key, 0)
+        if frames is None and (key, generation) in self.search_building:
+            return
+        self.search_building.add((key, generation))
+        workbook = workbook or self.search_cache_workbook(db_manager)
+
+        def task():
+            # Runs on the index worker thread
+            try:
+                catalog_stamp = stamp if frames else db_manager.get_catalog_stamp()
+                search_index = SearchIndex.load(workbook, catalog_stamp) if workbook and not frames else None
+                if search_index is None:
+                    schema_df, routines_df = frames or (db_manager.get_all_schemas(),
+                                                        db_manager.get_procedures_and_functions())
+                    search_index = SearchIndex.build(schema_df, routines_df)
+                    if workbook and catalog_stamp is not None:
+                        search_index.save(workbook, catalog_stamp)
+                self.search_index_ready.emit(key, generation, search_index, "")
+            except Exception as e:
+                self.search_index_ready.emit(key, generation, None, str(e))
+
+        self.statusBar().showMessage("Building search index...")
+        self.index_executor.submit(task)
+
+    def on_search_index_ready(self, key, generation, search_index, error):
+        self.search_building.discard((key, generation))
+        current = key == self.db_manager.connection_string
+        if generation != self.search_generation.get(key, 0):
+            # A sync changed the DB while building: discard, the next search rebuilds
+            search_index = None
+        elif search_index is None:
+            if current:
+                self.statusBar().showMessage(f"Search index failed: {error}")
+            return
+        else:
+            self.search_indexes[key] = search_index
+
+        if current and self.search_input.text().strip():
+            self.run_search()
+        elif current:
+            self.statusBar().showMessage("Search index ready")
+
+    def run_search(self):
+        query = self.search_input.text().strip()
+        self.search_results.clear()
+        if len(query) < 2:
+            return
+
+        search_index = self.get_search_index()
+        if search_index is None:
+            # Re-run by on_search_index_ready
+            return
+
+        try:
+            started = time.perf_counter()
+            results = search_index.search(query, limit=200)
+            elapsed = (time.perf_counter() - started) * 1000
+        except Exception as e:
+            self.statusBar().showMessage(f"Search failed: {e}")
+            return
+
+        for kind, name, detail, matched_in in results:
+            text = f"{kind:<10} {name}"
+            if detail:
+                text += f"  ({detail})"
+            if matched_in == 'definition':
+                text += "  - referenced in definition"
+            self.search_results.addItem(text)
+        self.statusBar().showMessage(f"{len(results)} result(s) in {elapsed:.1f} ms")
+
     def start_watching(self, filename):
-        # Stop existing observer
-        if self.observer:
-            self.observer.stop()
-            self.observer.join()
-        
-        self.current_excel_file = os.path.abspath(filename)
-        self.watcher_handler = ExcelFileHandler(self.current_excel_file)
-        # Connect signal to slot
-        self.watcher_handler.file_modified.connect(self.on_file_saved)
-        
-        self.observer = Observer()
-        self.observer.schedule(self.watcher_handler, path=os.path.dirname(self.current_excel_file), recursive=False)
-        self.observer.start()
-        print(f"Started watching: {self.current_excel_file}")
+        # Keep previous workbooks watched; each one stays mapped to its own DB connection
+        self.current_excel_file = self.watch_service.watch(filename, self.db_manager)
+        self.sync_panel.add_file(self.current_excel_file, self.db_manager.database)
 
-    def on_file_saved(self):
+    def on_file_saved(self, path):
         if self.auto_sync_chk.isChecked():
             # Add small delay to let Excel release lock fully
-            QTimer.singleShot(500, lambda: self.sync_schema(auto=True))
+            QTimer.singleShot(500, lambda: self.queue_sync(path, JOB_AUTO))
+
+    def queue_sync(self, path, kind=JOB_AUTO, dialog=None):
+        db_manager = self.watch_service.db_manager_for(path) or self.db_manager
+        on_plan, progress = dialog.sync_callbacks(kind) if dialog else (None, None)
+        dry_run = kind == JOB_PREVIEW
+        # Applying re-plans without locks and refuses if the plan differs from the approved preview
+        approved = dialog.planned if dialog and kind == JOB_APPLY else None
+
+        def task():
+            # Runs on a sync worker thread
+            handler = ExcelHandler(filename=path)
+            df = handler.read_schema()
+            if df is None:
+                return False, [f"Could not read '{path}'.\nMake sure the file exists and is not open."]
+            # Routine shards have an empty schema and only deploy routines
+            routines_df = handler.read_routines()
+            if df.empty and (routines_df is None or routines_df.empty):
+                return False, ["Excel file seems empty."]
+            # Unattended auto-sync refuses changes that break dependent objects;
+            # a manual sync shows them in the preview and only warns.
+            return db_manager.sync_schema(df, dry_run=dry_run, on_plan=on_plan, progress=progress,
+                                          routines_df=routines_df,
+                                          dependency_policy='block' if kind == JOB_AUTO else 'warn',
+                                          approved=approved)
+
+        priority = PRIORITY_AUTO if kind == JOB_AUTO else PRIORITY_MANUAL
+        if not self.sync_queue.submit(path, db_manager.connection_string, task, priority=priority, kind=kind):
+            self.statusBar().showMessage("Sync queue is full, try again later")
+            if dialog:
+                dialog.on_finished(kind, False, ["Sync queue is full, try again later"])
+            return
+
+        if dry_run:
+            status_msg = "Planning sync..."
+        else:
+            status_msg = "Auto-Syncing..." if kind == JOB_AUTO else "Syncing schema from Excel..."
+        self.statusBar().showMessage(f"{status_msg} ({self.sync_queue.pending_count()} pending)")
 
     def sync_schema(self, auto=False):
-        if not auto:
-            reply = QMessageBox.question(self, 'Sync Confirmation', 
-                                         "This will update the database schema based on the Excel file.\n"
-                                         "Are you sure you want to proceed?",
-                                         QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, 
-                                         QMessageBox.StandardButton.No)
-            
-            if reply == QMessageBox.StandardButton.No:
-                return
+        # Selected workbook in the panel, else the most recent export
+        filename_to_read = self.sync_panel.selected_file() or self.current_excel_file or "ExcelDBManager.xlsx"
+        path = os.path.normcase(os.path.abspath(filename_to_read))
+        self.sync_panel.add_file(path, (self.watch_service.db_manager_for(path) or self.db_manager).database)
 
-        status_msg = "Auto-Syncing..." if auto else "Syncing schema from Excel..."
-        self.statusBar().showMessage(status_msg)
-        
-        try:
-            # If auto, use the current_excel_file known to watcher
-            filename_to_read = "ExcelDBManager.xlsx"
-            if auto and self.current_excel_file:
-                 filename_to_read = self.current_excel_file
-            
-            # 1. Read Excel
-            handler = ExcelHandler(filename=filename_to_read)
-            df = handler.read_schema()
-            
-            if df is None:
-                if not auto: 
-                    QMessageBox.warning(self, "Error", f"Could not read '{filename_to_read}'.\nMake sure the file exists and is not open.")
-                self.statusBar().showMessage("Sync Failed (File Read Error)")
-                return
-                
-            if df.empty:
-                if not auto:
-                    QMessageBox.warning(self, "Error", "Excel file seems empty.")
-                self.statusBar().showMessage("Sync Failed (Empty File)")
+        if auto:
+            self.queue_sync(path, JOB_AUTO)
+            return
+
+        # Manual sync: dry run into a preview, the dialog's Apply button queues the real sync
+        dialog = self.preview_dialogs.get(path)
+        if dialog is None:
+            # Kept alive after closing so an in-flight sync can still report into it
+            dialog = SyncPreviewDialog(path, lambda d: self.queue_sync(d.path, JOB_APPLY, dialog=d), self)
+            self.preview_dialogs[path] = dialog
+        elif dialog.busy:
+            # Still applying: just bring the live view back
+            dialog.show()
+            dialog.raise_()
+            return
+        dialog.reset()
+        dialog.show()
+        dialog.raise_()
+        self.queue_sync(path, JOB_PREVIEW, dialog=dialog)
+
+    def on_sync_finished(self, path, success, logs, kind):
+        auto = kind == JOB_AUTO
+        # Only preview / apply jobs report into the dialog; auto-sync results never do
+        dialog = None if auto else self.preview_dialogs.get(path)
+        if dialog:
+            dialog.on_finished(kind, success, logs)
+            if kind == JOB_PREVIEW:
+                self.sync_panel.set_state(path, "Idle")
+                self.statusBar().showMessage("Sync preview ready" if success else "Sync preview failed")
                 return
 
-            # 2. Sync
-            success, logs = self.db_manager.sync_schema(df)
-            
-            if success:
-                # Show detailed logs if any
-                msg = "\n".join(logs)
+        # Show detailed logs if any
+        msg = "\n".join(logs)
+        self.sync_panel.set_last_sync(path, success, msg)
+
+        if success:
+            if kind != JOB_PREVIEW:
+                # The DB changed: rebuild its search index on the next search (the cache's stamp no longer matches)
+                key = (self.watch_service.db_manager_for(path) or self.db_manager).connection_string
+                self.search_indexes.pop(key, None)
+                self.search_generation[key] = self.search_generation.get(key, 0) + 1
+
+            if not auto and not dialog:
                 if len(msg) > 500: msg = msg[:500] + "\n...(truncated)"
+                QMessageBox.information(self, "Sync Successful", f"Database updated successfully.\n\nChanges:\n{msg}")
+            elif auto:
+                print(f"Auto-Sync Log: {msg}") # Console log for auto
                 
-                if not auto:
-                    QMessageBox.information(self, "Sync Successful", f"Database updated successfully.\n\nChanges:\n{msg}")
-                else:
-                    print(f"Auto-Sync Log: {msg}") # Console log for auto
-                    
-                self.statusBar().showMessage("Sync Completed")
-            else:
-                if not auto:
-                    QMessageBox.critical(self, "Sync Failed", f"Errors occurred:\n{logs[0]}")
-                self.statusBar().showMessage("Sync Failed")
-                
-        except Exception as e:
-            if not auto:
-                QMessageBox.critical(self, "Error", f"Unexpected error: {e}")
-            self.statusBar().showMessage(f"Error: {e}")
+            self.statusBar().showMessage(f"Sync Completed: {os.path.basename(path)}")
+        else:
+            if not auto and not dialog:
+                QMessageBox.critical(self, "Sync Failed", f"Errors occurred:\n{logs[0]}")
+            self.statusBar().showMessage(f"Sync Failed: {os.path.basename(path)}")
 
     def closeEvent(self, event):
-        if self.observer:
-            self.observer.stop()
-            self.observer.join()
+        self.watch_service.stop()
+        self.sync_queue.shutdown()
+        self.index_executor.shutdown(wait=False, cancel_futures=True)
+        self.connections.close_all()
         event.accept()
@@ -0,0 +1,169 @@
+import configparser
+import os
+import threading
+import time
+from collections import OrderedDict
+from src.crypto_utils import CryptoManager
+from src.db_manager import DBManager
+
+PROFILE_PREFIX = "Profile:"
+FIELDS = ['Server', 'Database', 'User', 'Password']
+
+
+class ProfileManager:
+    """
+    Stores many encrypted connection profiles in config.ini.
+    The key file is read and every profile decrypted once per session.
+
+    Layout:
+        [Profile:<name>]  encrypted Server / Database / User / Password
+        [Settings]        LastProfile = <name>
+        [MSSQL]           copy of the last used profile (read by older builds)
+    """
+    def __init__(self, config_file="config.ini", crypto=None):
+        self.config_file = config_file
+        self.crypto = crypto or CryptoManager()
+        self.last_profile = ''
+        self._profiles = OrderedDict()  # name -> {'Server': ..., ...} (decrypted)
+        self._encrypted = {}            # name -> {'Server': ..., ...} (as stored)
+        self._load()
+
+    def _load(self):
+        config = configparser.ConfigParser()
+        if not os.path.exists(self.config_file):
+            return
+        config.read(self.config_file)
+
+        def get_decrypted(section, key):
+            val = config[section].get(key, '')
+            decrypted = self.crypto.decrypt(val)
+            # Fallback: if decryption returns empty but val wasn't, it might be legacy plain text.
+            return decrypted if decrypted else val
+
+        for section in config.sections():
+            if section.startswith(PROFILE_PREFIX):
+                name = section[len(PROFILE_PREFIX):]
+                self._profiles[name] = {k: get_decrypted(section, k) for k in FIELDS}
+                self._encrypted[name] = {k: config[section].get(k, '') for k in FIELDS}
+
+        if 'Settings' in config:
+            self.last_profile = config['Settings'].get('LastProfile', '')
+
+        # Migrate the single legacy profile
+        if not self._profiles and 'MSSQL' in config:
+            legacy = {k: get_decrypted('MSSQL', k) for k in FIELDS}
+            name = legacy['Database'] or "Default"
+            self._profiles[name] = legacy
+            self._encrypted[name] = {k: self.crypto.encrypt(v) for k, v in legacy.items()}
+            self.last_profile = name
+
+    def names(self):
+        return list(self._profiles.keys())
+
+    def get(self, name):
+        """Returns the decrypted profile dict, or None."""
+        profile = self._profiles.get(name)
+        return dict(profile) if profile else None
+
+    def save_profile(self, name, server, db, user, password):
+        profile = {'Server': server, 'Database': db, 'User': user, 'Password': password}
+        if self._profiles.get(name) != profile:
+            self._profiles[name] = profile
+            self._encrypted[name] = {k: self.crypto.encrypt(v) for k, v in profile.items()}
+        self.last_profile = name
+        self._write()
+
+    def delete_profile(self, name):
+        if name not in self._profiles:
+            return
+        del self._profiles[name]
+        del self._encrypted[name]
+        if self.last_profile == name:
+            self.last_profile = next(iter(self._profiles), '')
+        self._write()
+
+    def set_last_profile(self, name):
+        if name in self._profiles and name != self.last_profile:
+            self.last_profile = name
+            self._write()
+
+    def _write(self):
+        config = configparser.ConfigParser()
+        if self.last_profile in self._encrypted:
+            config['MSSQL'] = self._encrypted[self.last_profile]
+        config['Settings'] = {'LastProfile': self.last_profile}
+        for name, encrypted in self._encrypted.items():
+            config[PROFILE_PREFIX + name] = encrypted
+        with open(self.config_file, 'w') as configfile:
+            config.write(configfile)
+
+
+class ConnectionCache:
+    """
+    Keeps connected DBManagers for recently used profiles (LRU), so switching
+    databases reuses a warm engine pool instead of reconnecting.
+    Managers idle longer than idle_timeout seconds have their pools disposed.
+    """
+    def __init__(self, max_size=4, idle_timeout=600):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # name -> [db_manager, last_used, profile]
+
+    def add(self, name, profile, db_manager):
+        """Registers an already connected manager (e.g. from the login dialog)."""
+        with self._lock:
+            old = self._entries.pop(name, None)
+            self._entries[name] = [db_manager, time.time(), dict(profile)]
+            evicted = self._trim()
+        if old and old[0] is not db_manager:
+            evicted.append(old[0])
+        for manager in evicted:
+            manager.dispose()
+
+    def get(self, name, profile):
+        """
+        Returns (db_manager, error). Cached managers are returned without a round trip;
+        otherwise a new one is connected and cached.
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry and entry[2] == profile:
+                entry[1] = time.time()
+                self._entries.move_to_end(name)
+                return entry[0], ""
+
+        manager = DBManager(profile['Server'], profile['Database'], profile['User'], profile['Password'])
+        success, error_msg = manager.connect()
+        if not success:
+            return None, error_msg
+        self.add(name, profile, manager)
+        return manager, ""
+
+    def _trim(self):
+        # Caller holds the lock
+        evicted = []
+        while len(self._entries) > self.max_size:
+            _, entry = self._entries.popitem(last=False)
+            evicted.append(entry[0])
+        return evicted
+
+    def evict_idle(self, keep=None):
+        """Disposes managers idle longer than idle_timeout, except `keep` (the active one)."""
+        now = time.time()
+        evicted = []
+        with self._lock:
+            for name, entry in list(self._entries.items()):
+                if entry[0] is not keep and now - entry[1] > self.idle_timeout:
+                    del self._entries[name]
+                    evicted.append(entry[0])
+        for manager in evicted:
+            print(f"Disposing idle connection: {manager.database}")
+            manager.dispose()
+
+    def close_all(self):
+        with self._lock:
+            managers = [entry[0] for entry in self._entries.values()]
+            self._entries.clear()
+        for manager in managers:
+            manager.dispose()
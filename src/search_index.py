@@ -0,0 +1,187 @@
+import os
+import re
+import pickle
+from bisect import bisect_left
+from src.sql_utils import TOKEN_RE
+
+# Separators between the parts of a name
+NAME_SPLIT_RE = re.compile(r'[\W_]+')
+
+
+class SearchIndex:
+    """
+    In-memory inverted index over tables, columns and routine definitions.
+
+    Every name and definition token is a term. Terms are kept sorted for prefix
+    queries (bisect) and in a trigram index for substring queries, so lookups
+    never scan the catalog itself.
+    Entries are (kind, name, detail) tuples: TABLE / COLUMN / PROCEDURE / FUNCTION.
+    """
+    VERSION = 1
+
+    def __init__(self):
+        self.entries = []        # entry id -> (kind, name, detail)
+        self.terms = []          # sorted vocabulary
+        self.name_postings = []  # term id -> entry ids whose name contains the term
+        self.def_postings = []   # term id -> routine entry ids whose definition contains the term
+        self.trigrams = {}       # trigram -> list of term ids
+
+    @classmethod
+    def build(cls, schema_df, routines_df):
+        """Builds the index from get_all_schemas / get_procedures_and_functions results."""
+        index = cls()
+        postings = {}  # term -> ([name entry ids], [definition entry ids])
+
+        def add(term, entry_id, is_name):
+            lists = postings.get(term)
+            if lists is None:
+                lists = postings[term] = ([], [])
+            lists[0 if is_name else 1].append(entry_id)
+
+        def add_name(name, entry_id):
+            lowered = name.lower()
+            add(lowered, entry_id, True)
+            # Also index the parts of dotted / underscored names, e.g. TB_USER -> tb, user
+            for token in set(NAME_SPLIT_RE.split(lowered)) - {lowered, ''}:
+                add(token, entry_id, True)
+
+        if schema_df is not None and not schema_df.empty:
+            for table, group in schema_df.groupby('Table', sort=False):
+                table = str(table)
+                entry_id = len(index.entries)
+                index.entries.append(('TABLE', table, f"{len(group)} column(s)"))
+                add_name(table, entry_id)
+
+                for column, data_type in zip(group['Column Name'], group['Data Type']):
+                    column = str(column)
+                    entry_id = len(index.entries)
+                    index.entries.append(('COLUMN', f"{table}.{column}", str(data_type)))
+                    add_name(column, entry_id)
+
+        if routines_df is not None and not routines_df.empty:
+            has_schema = 'schema' in routines_df.columns
+            for row in routines_df.itertuples(index=False):
+                name = str(row.name)
+                schema = str(row.schema) if has_schema and row.schema else 'dbo'
+                entry_id = len(index.entries)
+                index.entries.append((str(row.type).upper(), f"{schema}.{name}", ''))
+                add_name(name, entry_id)
+
+                # Definition tokens: one posting per distinct token
+                tokens = set(TOKEN_RE.findall(str(row.definition).lower()))
+                tokens.discard(name.lower())
+                for token in tokens:
+                    add(token, entry_id, False)
+
+        index.terms = sorted(postings)
+        index.name_postings = [postings[term][0] for term in index.terms]
+        index.def_postings = [postings[term][1] for term in index.terms]
+        for term_id, term in enumerate(index.terms):
+            for gram in {term[i:i + 3] for i in range(len(term) - 2)}:
+                index.trigrams.setdefault(gram, []).append(term_id)
+        return index
+
+    def _prefix_terms(self, query):
+        start = bisect_left(self.terms, query)
+        end = start
+        while end < len(self.terms) and self.terms[end].startswith(query):
+            end += 1
+        return range(start, end)
+
+    def _substring_terms(self, query):
+        if len(query) < 3:
+            # Too short for trigrams: scan the vocabulary (not the catalog)
+            return [i for i, term in enumerate(self.terms) if query in term]
+
+        grams = {query[i:i + 3] for i in range(len(query) - 2)}
+        candidates = None
+        for gram in sorted(grams, key=lambda g: len(self.trigrams.get(g, ()))):
+            term_ids = self.trigrams.get(gram)
+            if not term_ids:
+                return []
+            candidates = set(term_ids) if candidates is None else candidates.intersection(term_ids)
+            if not candidates:
+                return []
+        return [i for i in candidates if query in self.terms[i]]
+
+    def search(self, query, limit=200, substring=True):
+        """
+        Returns up to `limit` results as (kind, name, detail, matched_in), best matches first.
+        matched_in is 'name' or 'definition'.
+
+        Name matches always rank before definition matches, so an entry whose name matches
+        in any tier is never reported as a definition match. Each is ranked in tiers:
+        exact term, prefix, substring. Within a tier entries keep catalog order, and lower
+        tiers are skipped once the limit is reached.
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        prefix = list(self._prefix_terms(query))
+        exact = [i for i in prefix[:1] if self.terms[i] == query]
+        prefix = prefix[len(exact):]
+        tiers = [exact, prefix]
+        if substring:
+            # Only computed if the earlier tiers don't fill the limit
+            tiers.append(lambda: [i for i in self._substring_terms(query) if not self.terms[i].startswith(query)])
+
+        results = []
+        seen = set()
+        for postings, matched_in in ((self.name_postings, 'name'), (self.def_postings, 'definition')):
+            for t, term_ids in enumerate(tiers):
+                if callable(term_ids):
+                    term_ids = tiers[t] = term_ids()
+                ids = set()
+                for term_id in term_ids:
+                    ids.update(postings[term_id])
+                ids -= seen
+                if not ids:
+                    continue
+
+                needed = limit - len(results)
+                for entry_id in (sorted(ids)[:needed] if len(ids) > needed else sorted(ids)):
+                    kind, name, detail = self.entries[entry_id]
+                    results.append((kind, name, detail, matched_in))
+                seen |= ids
+                if len(results) >= limit:
+                    return results
+        return results
+        return results
+
+    # -- Cache (stored next to the exported workbook, tagged with the catalog stamp) --
+
+    @staticmethod
+    def cache_path(workbook):
+        base, _ = os.path.splitext(workbook)
+        return base + ".search.pkl"
+
+    def save(self, workbook, stamp):
+        """Saves the index next to a workbook; `stamp` is DBManager.get_catalog_stamp() taken before building."""
+        try:
+            with open(self.cache_path(workbook), 'wb') as f:
+                pickle.dump((self.VERSION, stamp, self.entries, self.terms, self.name_postings,
+                             self.def_postings, self.trigrams), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            return True
+        except Exception as e:
+            print(f"Error saving search index: {e}")
+            return False
+
+    @classmethod
+    def load(cls, workbook, stamp):
+        """Loads the cached index of a workbook, or returns None if missing or built from another catalog state."""
+        path = cls.cache_path(workbook)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                version, cached_stamp, *data = pickle.load(f)
+            if version != cls.VERSION or cached_stamp != stamp:
+                return None
+            index = cls()
+            index.entries, index.terms, index.name_postings, index.def_postings, index.trigrams = data
+            return index
+        except Exception as e:
+            print(f"Error loading search index: {e}")
+            return None
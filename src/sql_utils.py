@@ -0,0 +1,9 @@
+import re
+
+# Identifiers in names and routine definitions (Unicode letters, so Korean names are matched too)
+TOKEN_RE = re.compile(r'[^\W\d][\w@#$]*')
+
+
+def definition_tokens(definition):
+    """Lower-cased identifier tokens of a routine definition (brackets and dots split names)."""
+    return frozenset(TOKEN_RE.findall(definition.lower()))
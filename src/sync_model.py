@@ -0,0 +1,244 @@
+import threading
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+from PyQt6.QtGui import QColor
+
+
+IMPACT_COLOR = QColor('#f0ad4e')
+
+
+class SyncRun:
+    """
+    Change list plus per-change status and timing for one sync.
+    Created on the sync worker thread so progress is never lost while the
+    model is still being attached on the GUI thread.
+    """
+    def __init__(self, changes):
+        self.changes = list(changes)
+        self.status = ['Pending'] * len(self.changes)
+        self.elapsed = [None] * len(self.changes)
+        self.model = None
+
+    def record_progress(self, index, status, elapsed_ms):
+        """Progress callback for DBManager.sync_schema."""
+        self.status[index] = status
+        if elapsed_ms is not None:
+            self.elapsed[index] = elapsed_ms
+        model = self.model
+        if model is not None:
+            model.mark_dirty(index)
+
+
+class SyncChangesModel(QAbstractTableModel):
+    """
+    Table model over the change list produced by DBManager.plan_sync.
+
+    Rows are fetched lazily in batches, and sorting / filtering work on an index
+    permutation, so no per-row objects are created no matter how many changes there are.
+    Status and timing are written into the attached SyncRun (from the sync worker
+    thread) and flushed to the view by a timer.
+    """
+    COLUMNS = ['#', 'Table', 'Column', 'Operation', 'Detail', 'Status', 'Time (ms)', 'Impact']
+    FETCH_BATCH = 1000
+    FLUSH_INTERVAL_MS = 100
+
+    STATUS_COLORS = {
+        'Running': QColor('#3d8ec9'),
+        'Done': QColor('#5cb85c'),
+        'Failed': QColor('#d9534f'),
+        'Rolled Back': QColor('#f0ad4e'),
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._changes = []
+        self._status = []
+        self._elapsed = []
+        self._order = []     # view row -> change index (after filter/sort)
+        self._row_of = []    # change index -> view row, -1 if filtered out
+        self._loaded = 0     # rows exposed to the view so far
+        self._sort = None    # (column, order)
+        self._table_filter = ''
+        self._operation_filter = ''
+
+        self._dirty_lock = threading.Lock()
+        self._dirty = None   # (min change index, max change index)
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self._flush_progress)
+        self._flush_timer.start()
+
+    # -- Data loading --
+
+    def set_run(self, run):
+        """Attaches a SyncRun; must be called on the GUI thread."""
+        self.beginResetModel()
+        self._changes = run.changes
+        self._status = run.status
+        self._elapsed = run.elapsed
+        with self._dirty_lock:
+            self._dirty = None
+        self._rebuild_order()
+        self.endResetModel()
+        run.model = self
+
+    def change_count(self):
+        return len(self._changes)
+
+    def visible_count(self):
+        return len(self._order)
+
+    def impact_count(self):
+        return sum(1 for c in self._changes if c.get('Impact'))
+
+    def status_counts(self):
+        counts = {}
+        for s in self._status:
+            counts[s] = counts.get(s, 0) + 1
+        return counts
+
+    # -- Live progress --
+
+    def mark_dirty(self, index):
+        """Thread-safe: marks a change for the next flush."""
+        with self._dirty_lock:
+            if self._dirty is None:
+                self._dirty = (index, index)
+            else:
+                self._dirty = (min(self._dirty[0], index), max(self._dirty[1], index))
+
+    def _flush_progress(self):
+        with self._dirty_lock:
+            dirty = self._dirty
+            self._dirty = None
+        if dirty is None or not self._loaded:
+            return
+
+        if self._sort is None and not self._table_filter and not self._operation_filter:
+            # Identity order: change index == view row
+            first, last = dirty[0], min(dirty[1], self._loaded - 1)
+        else:
+            rows = [self._row_of[i] for i in range(dirty[0], dirty[1] + 1) if 0 <= self._row_of[i] < self._loaded]
+            if not rows:
+                return
+            first, last = min(rows), max(rows)
+
+        if first <= last:
+            self.dataChanged.emit(self.index(first, 5), self.index(last, 6))
+
+    # -- Filtering / Sorting --
+
+    def set_filter(self, table_text='', operation=''):
+        self.beginResetModel()
+        self._table_filter = table_text.strip().lower()
+        self._operation_filter = operation
+        self._rebuild_order()
+        self.endResetModel()
+
+    def _rebuild_order(self):
+        table_filter = self._table_filter
+        operation = self._operation_filter
+        changes = self._changes
+
+        if table_filter or operation:
+            order = [i for i, c in enumerate(changes)
+                     if (not table_filter or table_filter in c['Table'].lower())
+                     and (not operation or c['Operation'] == operation)]
+        else:
+            order = list(range(len(changes)))
+
+        if self._sort is not None:
+            column, sort_order = self._sort
+            key = self._sort_key(column)
+            order.sort(key=key, reverse=(sort_order == Qt.SortOrder.DescendingOrder))
+
+        self._order = order
+        self._row_of = [-1] * len(changes)
+        for row, i in enumerate(order):
+            self._row_of[i] = row
+        self._loaded = min(self.FETCH_BATCH, len(order))
+
+    def _sort_key(self, column):
+        if column == 0:
+            return lambda i: i
+        if column == 5:
+            return lambda i: self._status[i]
+        if column == 6:
+            return lambda i: self._elapsed[i] if self._elapsed[i] is not None else -1.0
+        field = self.COLUMNS[column]
+        return lambda i: str(self._changes[i].get(field, '')).lower()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        self._sort = (column, order)
+        loaded = self._loaded
+        self._rebuild_order()
+        # Keep at least as many rows loaded as before so the view doesn't jump
+        self._loaded = min(max(loaded, self._loaded), len(self._order))
+        self.layoutChanged.emit()
+
+    # -- QAbstractTableModel --
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.COLUMNS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._loaded < len(self._order)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        remaining = len(self._order) - self._loaded
+        count = min(self.FETCH_BATCH, remaining)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+
+        i = self._order[index.row()]
+        column = index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return i + 1
+            if column == 5:
+                return self._status[i]
+            if column == 6:
+                elapsed = self._elapsed[i]
+                return f"{elapsed:.1f}" if elapsed is not None else ''
+            return self._changes[i].get(self.COLUMNS[column], '')
+
+        if role == Qt.ItemDataRole.ToolTipRole and column == 4:
+            return self._changes[i]['SQL']
+
+        if role == Qt.ItemDataRole.ToolTipRole and column == 7:
+            return self._changes[i].get('Impact') or None
+
+        if role == Qt.ItemDataRole.ForegroundRole and column == 5:
+            return self.STATUS_COLORS.get(self._status[i])
+
+        if role == Qt.ItemDataRole.ForegroundRole and column == 7:
+            return IMPACT_COLOR
+
+        if role == Qt.ItemDataRole.TextAlignmentRole and column in (0, 6):
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+
+        return None
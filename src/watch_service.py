@@ -0,0 +1,230 @@
+import os
+import time
+import heapq
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+from PyQt6.QtCore import QObject, pyqtSignal
+
+# Priorities for SyncQueue.submit (lower runs first)
+PRIORITY_MANUAL = 0
+PRIORITY_AUTO = 1
+
+# Job kinds. Only jobs of the same kind for the same workbook are coalesced,
+# so a preview (dry run) is never merged with a sync that changes the DB.
+JOB_AUTO = 'auto'        # auto-sync on save
+JOB_PREVIEW = 'preview'  # dry run for the preview dialog
+JOB_APPLY = 'apply'      # applying an approved preview
+
+
+class WorkbookEventHandler(FileSystemEventHandler):
+    """
+    Single handler shared by every watched directory.
+    Dispatches file events to the WatchService, which knows which workbooks are registered.
+    """
+    def __init__(self, service):
+        super().__init__()
+        self.service = service
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.service._on_path_changed(event.src_path)
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.service._on_path_changed(event.src_path)
+
+    def on_moved(self, event):
+        # Excel saves to a temp file and renames it over the workbook
+        if not event.is_directory:
+            self.service._on_path_changed(event.dest_path)
+
+
+class WatchService(QObject):
+    """
+    Watches many workbooks with one shared watchdog Observer.
+    Each workbook is mapped to the DBManager it was exported from.
+    """
+    file_modified = pyqtSignal(str)
+
+    def __init__(self, debounce=1.0):
+        super().__init__()
+        self.debounce = debounce
+        self.observer = None
+        self.handler = WorkbookEventHandler(self)
+        self._lock = threading.Lock()
+        self._workbooks = {}    # abs path -> db_manager
+        self._last_event = {}   # abs path -> last emitted time
+        self._dir_watches = {}  # directory -> [ObservedWatch, number of workbooks]
+
+    def watch(self, filename, db_manager):
+        """Registers a workbook. Re-registering a path just updates its DB mapping."""
+        path = os.path.normcase(os.path.abspath(filename))
+        directory = os.path.dirname(path)
+
+        with self._lock:
+            if self.observer is None:
+                self.observer = Observer()
+                self.observer.start()
+
+            is_new = path not in self._workbooks
+            self._workbooks[path] = db_manager
+            self._last_event[path] = time.time()
+
+            if is_new:
+                if directory in self._dir_watches:
+                    self._dir_watches[directory][1] += 1
+                else:
+                    watch = self.observer.schedule(self.handler, path=directory, recursive=False)
+                    self._dir_watches[directory] = [watch, 1]
+
+        print(f"Started watching: {path}")
+        return path
+
+    def unwatch(self, filename):
+        path = os.path.normcase(os.path.abspath(filename))
+        directory = os.path.dirname(path)
+
+        with self._lock:
+            if path not in self._workbooks:
+                return
+            del self._workbooks[path]
+            self._last_event.pop(path, None)
+
+            entry = self._dir_watches.get(directory)
+            if entry:
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    self.observer.unschedule(entry[0])
+                    del self._dir_watches[directory]
+
+        print(f"Stopped watching: {path}")
+
+    def db_manager_for(self, filename):
+        path = os.path.normcase(os.path.abspath(filename))
+        with self._lock:
+            return self._workbooks.get(path)
+
+    def watched_files(self):
+        with self._lock:
+            return list(self._workbooks.keys())
+
+    def _on_path_changed(self, src_path):
+        # Called from the observer thread
+        path = os.path.normcase(os.path.abspath(src_path))
+        with self._lock:
+            if path not in self._workbooks:
+                return
+            # Debounce: Prevent double events (which happen often with Excel)
+            current_time = time.time()
+            if current_time - self._last_event.get(path, 0) <= self.debounce:
+                return
+            self._last_event[path] = current_time
+
+        # Emit signal to GUI thread
+        self.file_modified.emit(path)
+
+    def stop(self):
+        with self._lock:
+            observer = self.observer
+            self.observer = None
+            self._workbooks.clear()
+            self._last_event.clear()
+            self._dir_watches.clear()
+
+        if observer:
+            observer.stop()
+            observer.join()
+
+
+class SyncQueue(QObject):
+    """
+    Bounded, prioritized queue of sync jobs.
+    Jobs for the same database run one at a time; different databases run in parallel.
+    A workbook that already has a pending job of the same kind is coalesced into a single job.
+    """
+    status_changed = pyqtSignal(str, str)               # path, state ('Pending' / 'Running')
+    sync_finished = pyqtSignal(str, bool, object, str)  # path, success, logs, kind
+
+    def __init__(self, max_pending=32, max_workers=4):
+        super().__init__()
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sync")
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._lanes = {}      # db key -> heap of [priority, seq, (path, kind)]
+        self._pending = {}    # (path, kind) -> job dict (also referenced from its lane heap)
+        self._running = set() # db keys with a job in flight
+        self._closed = False
+
+    def submit(self, path, db_key, task, priority=PRIORITY_AUTO, kind=JOB_AUTO):
+        """
+        Queues task() -> (success, logs) for a workbook.
+        Returns False if the queue is full or shut down.
+        """
+        key = (path, kind)
+        with self._lock:
+            if self._closed:
+                return False
+
+            job = self._pending.get(key)
+            if job:
+                # Coalesce: keep the newest task and the most urgent priority
+                job['task'] = task
+                if priority < job['entry'][0]:
+                    job['entry'][0] = priority
+                    heapq.heapify(self._lanes[job['db_key']])
+                return True
+
+            if len(self._pending) >= self.max_pending:
+                print(f"Sync queue full, dropped: {path}")
+                return False
+
+            entry = [priority, next(self._seq), key]
+            self._pending[key] = {'db_key': db_key, 'task': task, 'kind': kind, 'entry': entry}
+            heapq.heappush(self._lanes.setdefault(db_key, []), entry)
+
+        self.status_changed.emit(path, "Pending")
+        self._dispatch(db_key)
+        return True
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _dispatch(self, db_key):
+        with self._lock:
+            if self._closed or db_key in self._running:
+                return
+            lane = self._lanes.get(db_key)
+            if not lane:
+                self._lanes.pop(db_key, None)
+                return
+            _, _, key = heapq.heappop(lane)
+            job = self._pending.pop(key)
+            path = key[0]
+            self._running.add(db_key)
+
+        self.status_changed.emit(path, "Running")
+        self.executor.submit(self._run, path, job)
+
+    def _run(self, path, job):
+        try:
+            success, logs = job['task']()
+        except Exception as e:
+            success, logs = False, [str(e)]
+        finally:
+            with self._lock:
+                self._running.discard(job['db_key'])
+
+        self.sync_finished.emit(path, success, logs, job['kind'])
+        self._dispatch(job['db_key'])
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            self._lanes.clear()
+            self._pending.clear()
+        self.executor.shutdown(wait=True)